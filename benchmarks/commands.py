@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Benchmark every command of the CLI against an in process dcron stand-in, for every cluster size we record
+wall time, the number of requests the command issued and the peak RSS of the CLI process. For every encoding the
+stand-in offers (json, gzip, msgpack or gzip+msgpack) the size of /jobs on the wire and the time to decompress and
+decode it are recorded as well.
+
+usage: python -m benchmarks.commands [--sizes 10,1000,100000] [--encodings json,gzip+msgpack] [--output results.json]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from os.path import abspath, dirname, join
+
+import click
+
+from cli.client import Client
+from cli.configuration import Configuration
+from cli.timings import Timings
+from tests.server import DcronServer
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+JOB = ['-p', '0 * * * *', '-c', 'echo job-0']
+NEW_JOB = ['-p', '1 2 3 4 5', '-c', 'echo benchmark']
+
+# the rusage of a forked child starts out with the rss of its parent, so the child reports its own high water mark
+BOOTSTRAP = '''
+import atexit, os, resource, sys
+
+def report():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as status:
+            peak = next(int(l.split()[1]) * 1024 for l in status if l.startswith('VmHWM'))
+    with open(os.environ['DCRON_BENCH_RSS'], 'w') as fp:
+        fp.write(str(peak))
+
+atexit.register(report)
+from cli.application import main
+main()
+'''
+
+
+def commands(workdir):
+    export_file = join(workdir, 'export', 'jobs.json')
+    return [
+        ('status', ['status']),
+        ('verify', ['verify']),
+        ('jobs', ['jobs']),
+        ('running', ['running']),
+        ('details', ['details'] + JOB),
+        ('logs', ['logs'] + JOB),
+        ('add', ['add'] + NEW_JOB),
+        ('remove', ['remove'] + NEW_JOB),
+        ('run', ['run'] + JOB),
+        ('kill', ['kill'] + JOB),
+        ('export', ['export', '--force', '-f', export_file]),
+        ('import', ['import', '-f', export_file]),
+        ('snapshot', ['snapshot', 'create']),
+        ('rebalance', ['rebalance']),
+        ('info', ['info']),
+    ]
+
+
+def measure(server, config_file, args, workdir):
+    """
+    run a single command in a child process
+    :return: (wall time in seconds, requests issued, peak rss in bytes, exit code)
+    """
+    rss_file = join(workdir, 'rss')
+    env = dict(os.environ, DCRON_BENCH_RSS=rss_file)
+    requests_before = server.total_requests
+    start = time.perf_counter()
+    code = subprocess.call([sys.executable, '-c', BOOTSTRAP, '-c', config_file] + args,
+                           cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wall = time.perf_counter() - start
+    with open(rss_file) as fp:
+        rss = int(fp.read())
+    return wall, server.total_requests - requests_before, rss, code
+
+
+def wire(site, repeat):
+    """
+    fetch and decode /jobs in process
+    :return: timing record of the fastest run
+    """
+    records = []
+    for _ in range(repeat):
+        client = Client(site, sorted(site.servers)[0], timings=Timings())
+        client.json(client.get('/jobs'))
+        records.append(client.timings.requests[-1])
+    return min(records, key=lambda r: r['transfer'] + r['inflate'] + r['decode'])
+
+
+@click.command()
+@click.option('--sizes', default='10,1000,100000', help='comma separated job counts (default: 10,1000,100000)')
+@click.option('--nodes', default=3, help='number of nodes in the stand-in cluster (default: 3)')
+@click.option('--log-lines', default=3, help='log lines per job (default: 3)')
+@click.option('--log-size', default=80, help='characters per log line (default: 80)')
+@click.option('--latency', default=0.0, help='latency added to every request in seconds (default: 0)')
+@click.option('--failure-rate', default=0.0, help='fraction of requests answered with a 500 (default: 0)')
+@click.option('--encodings', default='json', help='comma separated encodings offered for /jobs and /export (json, gzip, msgpack, gzip+msgpack, default: json)')
+@click.option('--repeat', default=1, help='number of runs per command, the fastest is reported (default: 1)')
+@click.option('-o', '--output', default=None, help='write results as json to this file')
+def main(sizes, nodes, log_lines, log_size, latency, failure_rate, encodings, repeat, output):
+    results = []
+    transfers = []
+    click.echo("{0:>8} {1:<13} {2:<10} {3:>10} {4:>9} {5:>10} {6:>5}".format('jobs', 'encoding', 'command', 'wall (ms)', 'requests', 'rss (MB)', 'exit'))
+    for size in [int(s) for s in sizes.split(',')]:
+        workdir = tempfile.mkdtemp(prefix='dcron-bench-')
+        with DcronServer(jobs=size, nodes=nodes, log_lines=log_lines, log_size=log_size, latency=latency, failure_rate=failure_rate) as server:
+            config = Configuration()
+            config.sites = [server.site()]
+            config_file = join(workdir, 'sites.json')
+            config.write(config_file)
+            for encoding in encodings.split(','):
+                server.encodings = set(encoding.split('+')) - {'json'}
+                for name, args in commands(workdir):
+                    runs = [measure(server, config_file, args, workdir) for _ in range(repeat)]
+                    wall, issued, rss, code = min(runs)
+                    click.echo("{0:>8} {1:<13} {2:<10} {3:>10.1f} {4:>9} {5:>10.1f} {6:>5}".format(size, encoding, name, wall * 1000, issued, rss / 1048576.0, code))
+                    results.append({'jobs': size, 'encoding': encoding, 'command': name, 'wall': wall, 'requests': issued, 'rss': rss, 'exit': code})
+                record = wire(config.sites[0], repeat)
+                transfers.append((size, encoding, record))
+                results.append({'jobs': size, 'encoding': encoding, 'command': 'wire', 'bytes': record['bytes'], 'wire': record['wire'],
+                                'transfer': record['transfer'], 'inflate': record['inflate'], 'decode': record['decode']})
+    click.echo("{0:>8} {1:<13} {2:>12} {3:>12} {4:>13} {5:>12} {6:>11}".format('jobs', 'encoding', 'bytes', 'wire', 'transfer (ms)', 'inflate (ms)', 'decode (ms)'))
+    for size, encoding, record in transfers:
+        click.echo("{0:>8} {1:<13} {2:>12} {3:>12} {4:>13.2f} {5:>12.2f} {6:>11.2f}".format(
+            size, encoding, record['bytes'], record['wire'], record['transfer'] * 1000, record['inflate'] * 1000, record['decode'] * 1000))
+    if output:
+        with open(output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == '__main__':
+    main()
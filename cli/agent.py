@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import logging
+import os
+import socket
+import threading
+
+from socketserver import StreamRequestHandler, ThreadingMixIn, UnixStreamServer
+from time import monotonic, sleep
+
+import requests
+
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from cli.client import Client
+from cli.configuration import SiteEncoder, SiteDecoder
+
+# endpoints of which the agent keeps a periodically refreshed copy
+CACHED = ('/status', '/jobs')
+
+
+def encode_data(data):
+    """
+    make form data json serializable, payload lines are read from file as bytes
+    """
+    if data is None:
+        return None
+    encoded = {}
+    for key, value in data.items():
+        if isinstance(value, (list, tuple)):
+            encoded[key] = [v.decode('utf-8') if isinstance(v, bytes) else v for v in value]
+        elif isinstance(value, bytes):
+            encoded[key] = value.decode('utf-8')
+        else:
+            encoded[key] = value
+    return encoded
+
+
+def read_message(fp):
+    """
+    read a message (json header line followed by an optional body) from a socket file
+    :return: (header, body)
+    """
+    line = fp.readline()
+    if not line:
+        raise ConnectionError('connection closed')
+    header = json.loads(line.decode('utf-8'))
+    body = fp.read(header['length']) if header.get('length') else b''
+    return header, body
+
+
+def write_message(fp, header, body=b''):
+    header['length'] = len(body)
+    fp.write(json.dumps(header).encode('utf-8') + b'\n')
+    if body:
+        fp.write(body)
+    fp.flush()
+
+
+class Flight(object):
+    """
+    A single upstream request shared by everyone asking for the same thing while it is in progress
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Agent(object):
+    """
+    Local daemon holding pooled connections and a warm view of /status and /jobs for every site its clients
+    talk to. Identical concurrent reads result in a single upstream request, changes are always passed on.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, refresh=5.0, idle=300.0):
+        self.refresh = refresh
+        self.idle = idle
+        self.lock = threading.Lock()
+        self.clients = {}
+        self.cache = {}
+        self.flights = {}
+
+    def client(self, site, verify):
+        key = (site, verify)
+        with self.lock:
+            if key not in self.clients:
+                decoded = json.loads(site, cls=SiteDecoder)
+                self.clients[key] = Client(decoded, sorted(decoded.servers)[0], verify)
+            return self.clients[key]
+
+    def fetch(self, key):
+        site, verify, method, server, endpoint, data = key
+        r = self.client(site, verify).request(method, endpoint, server, data=json.loads(data) if data else None)
+        # the content is passed on decoded
+        headers = dict((k, v) for k, v in r.headers.items() if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding'))
+        return r.status_code, headers, r.content
+
+    def coalesced(self, key):
+        """
+        issue a request upstream, unless an identical request is already in progress
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+        if leader:
+            try:
+                flight.result = self.fetch(key)
+            except requests.exceptions.RequestException as e:
+                flight.error = str(e)
+            finally:
+                with self.lock:
+                    del self.flights[key]
+                flight.done.set()
+        else:
+            flight.done.wait()
+        if flight.error:
+            raise requests.exceptions.ConnectionError(flight.error)
+        return flight.result
+
+    def handle(self, request):
+        """
+        :param request: decoded request header
+        :return: (status, headers, body)
+        """
+        data = json.dumps(request['data'], sort_keys=True) if request.get('data') else None
+        key = (request['site'], request['verify'], request['method'], request.get('server'), request['endpoint'], data)
+        if request['method'] != 'GET':
+            # every change has to reach the cluster, even when an identical one is in progress
+            result = self.fetch(key)
+            self.invalidate(request['site'])
+            return result
+        if request['endpoint'] not in CACHED:
+            return self.coalesced(key)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached:
+                cached['used'] = monotonic()
+                if monotonic() - cached['fetched'] < self.refresh:
+                    return cached['result']
+        return self.update(key)
+
+    def update(self, key):
+        result = self.coalesced(key)
+        if result[0] == 200:
+            with self.lock:
+                used = self.cache[key]['used'] if key in self.cache else monotonic()
+                self.cache[key] = {'result': result, 'fetched': monotonic(), 'used': used}
+        return result
+
+    def invalidate(self, site):
+        with self.lock:
+            for key in [k for k in self.cache if k[0] == site and k[4] == '/jobs']:
+                del self.cache[key]
+
+    def refresher(self):
+        """
+        keep cached views warm, views nobody asked for in a while are dropped
+        """
+        while True:
+            sleep(self.refresh / 2.0)
+            now = monotonic()
+            with self.lock:
+                for key in [k for k, v in self.cache.items() if now - v['used'] > self.idle]:
+                    del self.cache[key]
+                stale = [k for k, v in self.cache.items() if now - v['fetched'] >= self.refresh / 2.0]
+            for key in stale:
+                try:
+                    self.update(key)
+                except requests.exceptions.RequestException as e:
+                    self.logger.warning("could not refresh {0} for {1}: {2}".format(key[4], key[3] or 'entry', e))
+
+    def serve(self, path):
+        """
+        serve requests on a unix domain socket until interrupted
+        """
+        agent = self
+
+        class Handler(StreamRequestHandler):
+
+            def handle(self):
+                try:
+                    header, _ = read_message(self.rfile)
+                    status, headers, body = agent.handle(header)
+                    write_message(self.wfile, {'status': status, 'headers': headers}, body)
+                except requests.exceptions.RequestException as e:
+                    write_message(self.wfile, {'error': str(e)})
+                except ConnectionError:
+                    # closed without a request (AgentConnection.available probing the socket) or before the answer
+                    pass
+                except (ValueError, KeyError) as e:
+                    agent.logger.warning("invalid request: {0}".format(e))
+
+        class Server(ThreadingMixIn, UnixStreamServer):
+            daemon_threads = True
+
+        if os.path.exists(path):
+            os.remove(path)
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        old_umask = os.umask(0o177)
+        try:
+            server = Server(path, Handler)
+        finally:
+            os.umask(old_umask)
+        threading.Thread(target=self.refresher, daemon=True).start()
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.remove(path)
+
+
+class AgentConnection(object):
+    """
+    Client side of the agent, sends requests for a site over the unix domain socket
+    """
+
+    def __init__(self, path, site, verify=True):
+        self.path = path
+        self.site = json.dumps(site, cls=SiteEncoder)
+        self.verify = verify
+
+    @staticmethod
+    def available(path):
+        if not path or not os.path.exists(path):
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    def request(self, method, endpoint, server=None, data=None, url=None):
+        """
+        :return: response as if the request was sent directly
+        """
+        request = {
+            'site': self.site,
+            'verify': self.verify,
+            'method': method,
+            'endpoint': endpoint,
+            'server': server,
+            'data': encode_data(data),
+        }
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+            fp = sock.makefile('rwb')
+            write_message(fp, request)
+            header, body = read_message(fp)
+        except OSError as e:
+            raise requests.exceptions.ConnectionError("agent unavailable: {0}".format(e))
+        finally:
+            sock.close()
+        if 'error' in header:
+            raise requests.exceptions.ConnectionError(header['error'])
+        r = requests.models.Response()
+        r.status_code = header['status']
+        r.headers = CaseInsensitiveDict(header['headers'])
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.url = url
+        r._content = body
+        return r
@@ -23,12 +23,20 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import cProfile
+import json
 import logging
 import os
 import random
+import re
+import sys
+import tempfile
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 from os.path import join
+from time import perf_counter, time
 
 import requests
 import click
@@ -36,7 +44,26 @@ import click_log
 
 from dateutil import parser, tz
 
+from cli.agent import Agent, AgentConnection
+from cli.bench import Bench, parse_mix
+from cli.browse import Browser
+from cli.client import Client
+from cli.completion import complete_with, complete_sites, complete_servers, complete_patterns, complete_commands, update_jobs
 from cli.configuration import Configuration, Site
+from cli.consistency import VOLATILE, job_digests, site_digest, compare
+from cli.distribution import STRATEGIES, ReadDistributor
+from cli.drift import Drift
+from cli.exporter import Exporter
+from cli.history import History, samples, seconds, timestamp
+from cli.offline import ExportIndex
+from cli.ping import Pinger
+from cli.preflight import existing_digests, preflight
+from cli.records import RecordError
+from cli.search import search
+from cli.snapshots import SnapshotStore
+from cli.timings import Timings
+from cli.waiting import JobWaiter
+from cli.wire import json_body
 
 logger = logging.getLogger()
 click_log.basic_config(logger)
@@ -44,19 +71,31 @@ click_log.basic_config(logger)
 
 @click.group()
 @click.option('-c', '--config-file', default=join(str(Path.home()), '.dcron', 'sites.json'), help='configuration file (created if not exists)')
-@click.option('-s', '--site-name', default='default', help='Name of the site to interact with (default: `default`)')
-@click.option('-m', '--selection-mechanism', default='first', help='selection mechanism for communicating with our clusters (first, last, random, `ip`, default: first)')
+@click.option('-s', '--site-name', default='default', help='Name of the site to interact with (default: `default`)', **complete_with(complete_sites))
+@click.option('-m', '--selection-mechanism', default='first', help='selection mechanism for communicating with our clusters (first, last, random, `ip`, default: first)', **complete_with(complete_servers))
+@click.option('-r', '--read-distribution', type=click.Choice(STRATEGIES), default='none', envvar='DCRON_READ_DISTRIBUTION', help='spread /status, /jobs and /export over all servers (round-robin, load, default: none)')
 @click.option('--no-ssl-verify', is_flag=True, help='disable ssl verification')
 @click.option('--debug', is_flag=True, help='force debug logging')
+@click.option('--timings', is_flag=True, help='report time spent per phase and per request')
+@click.option('--profile', default=None, help='write a cProfile dump of the invocation to this file')
+@click.option('--agent-socket', default=None, help='socket of the local agent (default: agent.sock next to the configuration file)')
+@click.option('--no-agent', is_flag=True, help='do not route requests through a running agent')
 @click.pass_context
-def cli(ctx, config_file, site_name, selection_mechanism, no_ssl_verify, debug):
+def cli(ctx, config_file, site_name, selection_mechanism, read_distribution, no_ssl_verify, debug, timings, profile, agent_socket, no_agent):
     """
     This CLI allows you to manage dcron installations. Check your config file for settings, the
     default location is in your home folder under `~/.dcron/sites.json`.
     """
-    ctx.obj = {'PATH': config_file}
+    ctx.obj = {'PATH': config_file, 'TIMINGS': Timings() if timings else None}
 
-    config_file = Configuration(config_file)
+    if profile or timings:
+        instrument(ctx, profile)
+
+    if ctx.obj['TIMINGS']:
+        with ctx.obj['TIMINGS'].phase('config'):
+            config_file = Configuration(config_file)
+    else:
+        config_file = Configuration(config_file)
     ctx.obj['SITE'] = next(iter([s for s in config_file.sites if s.name == site_name]), None)
 
     if not ctx.obj['SITE']:
@@ -79,18 +118,22 @@ def cli(ctx, config_file, site_name, selection_mechanism, no_ssl_verify, debug):
             exit(-3)
         ctx.obj['ENTRY'] = specific
 
-    if ctx.obj['SITE'].ssl:
-        ctx.obj['PREFIX'] = 'https'
-        ctx.obj['URI'] = "https://{0}:{1}".format(ctx.obj['ENTRY'], ctx.obj['SITE'].port)
-    else:
-        ctx.obj['PREFIX'] = 'http'
-        ctx.obj['URI'] = "http://{0}:{1}".format(ctx.obj['ENTRY'], ctx.obj['SITE'].port)
-
     if no_ssl_verify:
         ctx.obj['SSL_VERIFY'] = False
     else:
         ctx.obj['SSL_VERIFY'] = True
 
+    ctx.obj['AGENT_SOCKET'] = agent_socket or join(os.path.dirname(ctx.obj['PATH']), 'agent.sock')
+    agent = None
+    if not no_agent and ctx.invoked_subcommand != 'agent' and AgentConnection.available(ctx.obj['AGENT_SOCKET']):
+        agent = AgentConnection(ctx.obj['AGENT_SOCKET'], ctx.obj['SITE'], ctx.obj['SSL_VERIFY'])
+
+    distributor = None
+    if read_distribution != 'none' and not agent:
+        distributor = ReadDistributor(ctx.obj['SITE'].servers, read_distribution, distribution_path(ctx))
+
+    ctx.obj['CLIENT'] = Client(ctx.obj['SITE'], ctx.obj['ENTRY'], ctx.obj['SSL_VERIFY'], ctx.obj['TIMINGS'], agent, distributor=distributor)
+
     if ctx.obj['SITE'].log_level == 'debug' or ctx.obj['SITE'].log_level == 'verbose' or debug:
         logger.setLevel(logging.DEBUG)
     else:
@@ -98,11 +141,44 @@ def cli(ctx, config_file, site_name, selection_mechanism, no_ssl_verify, debug):
 
     logger.debug("using config file {0}".format(ctx.obj['PATH']))
     logger.debug("using entrypoint {0}".format(ctx.obj['ENTRY']))
+    if agent:
+        logger.debug("using agent on {0}".format(ctx.obj['AGENT_SOCKET']))
+    if distributor:
+        logger.debug("distributing reads {0} over {1}".format(read_distribution, ', '.join(distributor.servers)))
+    if ctx.obj['TIMINGS']:
+        ctx.obj['TIMINGS'].begin_command()
+
+
+def instrument(ctx, profile):
+    """
+    start profiling and timing the invocation, results are written when the context closes
+    """
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = perf_counter()
+
+    def finish():
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile)
+            logger.debug("written profile to {0}".format(profile))
+        if ctx.obj['TIMINGS']:
+            ctx.obj['TIMINGS'].report(logger, perf_counter() - start)
+
+    ctx.call_on_close(finish)
 
 
 @cli.command(help='show cluster status')
+@click.option('--record', is_flag=True, help='append the status of every node to the local history')
+@click.option('--history', is_flag=True, help='show the recorded history instead of the current status')
+@click.option('--since', default='24h', help='start of the history, duration or date/time (default: 24h)')
+@click.option('--until', default=None, help='end of the history, duration or date/time (default: now)')
+@click.option('--bucket', default=None, help='aggregate the history per duration (e.g. 1h, default: whole range)')
+@click.option('-n', '--node', default=None, help='only show the history of this node')
 @click.pass_context
-def status(ctx):
+def status(ctx, record, history, since, until, bucket, node):
     """
     report cluster status
     """
@@ -110,16 +186,18 @@ def status(ctx):
         logger.error('could not locate configuration object')
         exit(-10)
 
+    if history:
+        show_history(ctx, since, until, bucket, node)
+        return
+
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.get("{0}/status".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.get("{0}/status".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'])
-        if not r or not r.json() or len(r.json()) == 0:
+        r = ctx.obj['CLIENT'].get('/status')
+        content = ctx.obj['CLIENT'].json(r)
+        if not r or not content or len(content) == 0:
             logger.error("could not retrieve cluster state!")
         logging.info('------------------------------------------------------')
-        logging.info("{0} nodes in cluster".format(len(r.json())))
-        for line in r.json():
+        logging.info("{0} nodes in cluster".format(len(content)))
+        for line in content:
             if 'ip' not in line:
                 logger.error("could not find ip in state line: {0}".format(line))
             else:
@@ -131,12 +209,12 @@ def status(ctx):
                     dt = parser.parse(line['time'])
                     logging.info("communicated : {0:%Y-%m-%d %H:%M:%S}".format(dt.astimezone(tz.tzlocal())))
         logging.info('******************************************************')
+        in_sync = {}
         for server in ctx.obj['SITE'].servers:
+            in_sync[server] = None
             try:
-                if ctx.obj['SITE'].username:
-                    r = requests.get("{0}://{1}:{2}/cron_in_sync".format(ctx.obj['PREFIX'], server, ctx.obj['SITE'].port), verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-                else:
-                    r = requests.get("{0}://{1}:{2}/cron_in_sync".format(ctx.obj['PREFIX'], server, ctx.obj['SITE'].port), verify=ctx.obj['SSL_VERIFY'])
+                r = ctx.obj['CLIENT'].get('/cron_in_sync', server=server)
+                in_sync[server] = r.status_code == 200
                 if r.status_code == 200:
                     logging.info('cron in sync for {0}'.format(server))
                 else:
@@ -144,13 +222,271 @@ def status(ctx):
             except requests.exceptions.RequestException as re:
                 logger.error(re)
         logging.info('------------------------------------------------------')
+        if record:
+            jobs = ctx.obj['CLIENT'].json(ctx.obj['CLIENT'].get('/jobs'))
+            with History(history_path(ctx)) as ring:
+                ring.append(samples(time(), content, in_sync, jobs))
     except requests.exceptions.RequestException as e:
         logger.error(e)
 
 
+def distribution_path(ctx):
+    return join(os.path.dirname(ctx.obj['PATH']), 'distribution', "{0}.json".format(ctx.obj['SITE'].name))
+
+
+def query_jobs(ctx, from_export, running=None, enabled=None, **criteria):
+    """
+    :param from_export: export file to query through its index instead of the cluster
+    :param running: only running (True) or idle (False) jobs
+    :param enabled: only enabled (True) or disabled (False) jobs
+    :param criteria: exact values for parts, command, user and/or assigned_to
+    :return: matching jobs
+    """
+    if from_export:
+        if not os.path.exists(from_export):
+            logger.error("could not locate export {0}".format(from_export))
+            exit(-90)
+        try:
+            index = ExportIndex.open(from_export)
+        except (ValueError, OSError) as e:
+            logger.error("could not index export {0}: {1}".format(from_export, e))
+            exit(-91)
+        try:
+            return index.find(running=running, enabled=enabled, **criteria)
+        finally:
+            index.close()
+    content = ctx.obj['CLIENT'].json(ctx.obj['CLIENT'].get('/jobs'))
+    if running is None and enabled is None and not any(v is not None for v in criteria.values()):
+        return content
+    return [j for j in content
+            if (running is None or bool(j.get('pid')) == running) and (enabled is None or bool(j.get('enabled')) == enabled)
+            and all(v is None or j.get(k) == v for k, v in criteria.items())]
+
+
+def history_path(ctx):
+    return join(os.path.dirname(ctx.obj['PATH']), 'history', "{0}.ring".format(ctx.obj['SITE'].name))
+
+
+def show_history(ctx, since, until, bucket, node):
+    """
+    report aggregated status history
+    """
+    if not os.path.exists(history_path(ctx)):
+        logger.warning("no history recorded for site {0} (use status --record)".format(ctx.obj['SITE'].name))
+        exit(-80)
+    try:
+        start = timestamp(since) if since else None
+        end = timestamp(until) if until else None
+        size = seconds(bucket) if bucket else None
+    except ValueError as e:
+        logger.error(e)
+        exit(-81)
+
+    with History(history_path(ctx)) as ring:
+        result = ring.aggregate(start, end, node, size)
+    if len(result) == 0:
+        logger.info("no samples in the requested range")
+        return
+    logger.info("{0:<19} {1:<15} {2:>7} {3:>23} {4:>20} {5:>8} {6}".format(
+        'from', 'node', 'samples', 'load min/avg/max', 'running min/avg/max', 'in sync', 'state'))
+    for (name, begin), entry in sorted(result.items(), key=lambda i: (i[0][1] or 0, i[0][0])):
+        load = "{0:.1f}/{1:.1f}/{2:.1f}".format(*entry['load']) if entry['load'] else '-'
+        running = "{0:.0f}/{1:.1f}/{2:.0f}".format(*entry['running']) if entry['running'] else '-'
+        in_sync = "{0:.0f}%".format(entry['in_sync'] * 100) if entry['in_sync'] is not None else '-'
+        begin = datetime.fromtimestamp(begin if begin is not None else start or 0)
+        logger.info("{0:%Y-%m-%d %H:%M:%S} {1:<15} {2:>7} {3:>23} {4:>20} {5:>8} {6}".format(
+            begin, name, entry['samples'], load, running, in_sync, entry['state'] or '-'))
+
+
+@cli.command(help='export cluster metrics (OpenMetrics)')
+@click.option('-l', '--listen', default='127.0.0.1', help='address to serve metrics on (default: 127.0.0.1)')
+@click.option('-p', '--port', default=9479, help='port to serve metrics on, 0 disables serving (default: 9479)')
+@click.option('-i', '--interval', default=15.0, help='seconds between polls of the cluster (default: 15)')
+@click.option('-t', '--textfile', default=None, help='also write metrics to this file after every poll')
+@click.option('--once', is_flag=True, help='poll once, write the textfile and exit')
+@click.option('--record', is_flag=True, help='append the status of every node to the local history on every poll')
+@click.pass_context
+def exporter(ctx, listen, port, interval, textfile, once, record):
+    """
+    poll cluster state and expose it as metrics
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    # a dedicated client, request durations should be those of the cluster and not of the agent cache
+    client = Client(ctx.obj['SITE'], ctx.obj['ENTRY'], ctx.obj['SSL_VERIFY'], pool_size=len(ctx.obj['SITE'].servers))
+    metrics = Exporter(client, interval, textfile, History(history_path(ctx)) if record else None)
+    if once:
+        metrics.poll()
+        return
+    if port:
+        metrics.serve(listen, port)
+        logger.info("serving metrics on http://{0}:{1}/metrics".format(listen, port))
+    try:
+        metrics.run()
+    except KeyboardInterrupt:
+        logger.info("stopping exporter")
+
+
+@cli.command(help='run local agent serving cached cluster state')
+@click.option('-r', '--refresh', default=5.0, help='seconds after which cached status and jobs are refreshed (default: 5)')
+@click.option('--idle', default=300.0, help='seconds after which unused cached state is dropped (default: 300)')
+@click.pass_context
+def agent(ctx, refresh, idle):
+    """
+    serve requests of other invocations from pooled connections and warm state
+    """
+    logger.info("agent listening on {0}".format(ctx.obj['AGENT_SOCKET']))
+    try:
+        Agent(refresh, idle).serve(ctx.obj['AGENT_SOCKET'])
+    except KeyboardInterrupt:
+        logger.info("stopping agent")
+
+
+@cli.command(help='measure latency to every server')
+@click.option('-n', '--count', default=10, help='requests per server (default: 10)')
+@click.option('-c', '--concurrency', default=0, help='servers pinged concurrently (default: number of servers)')
+@click.option('-i', '--interval', default=0.0, help='seconds between requests to the same server (default: 0)')
+@click.option('-e', '--endpoint', default='/cron_in_sync', help='endpoint to request (default: /cron_in_sync)')
+@click.option('-t', '--timeout', default=5.0, help='seconds before a request fails (default: 5)')
+@click.option('--fresh', is_flag=True, help='open a new connection for every request')
+@click.pass_context
+def ping(ctx, count, concurrency, interval, endpoint, timeout, fresh):
+    """
+    report latency percentiles, jitter, connect, tls and server time and failures per server
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    servers = sorted(ctx.obj['SITE'].servers)
+    concurrency = concurrency or len(servers)
+    # a dedicated client, requests should not be answered from the agent
+    client = Client(ctx.obj['SITE'], ctx.obj['ENTRY'], ctx.obj['SSL_VERIFY'], Timings(), pool_size=concurrency)
+    pinger = Pinger(client, servers, count, concurrency, interval, endpoint, timeout, fresh)
+    pinger.run()
+    logger.info("{0:<15} {1:>5} {2:>6} {3:>5} {4:>8} {5:>8} {6:>8} {7:>8} {8:>8} {9:>8} {10:>8} {11:>8} {12:>8}".format(
+        'server', 'sent', 'failed', 'http', 'min ms', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms', 'jitter', 'connect', 'tls', 'server'))
+    unreachable = []
+    for server, sent, failed, status, latency, variation, connect, tls, ttfb in pinger.report():
+        if not latency['count']:
+            unreachable.append(server)
+            logger.info("{0:<15} {1:>5} {2:>6} {3:>5} {4:>8} {4:>8} {4:>8} {4:>8} {4:>8} {4:>8} {4:>8} {4:>8} {4:>8}".format(server, sent, failed, status, '-'))
+            continue
+        logger.info("{0:<15} {1:>5} {2:>6} {3:>5} {4:>8.2f} {5:>8.2f} {6:>8.2f} {7:>8.2f} {8:>8.2f} {9:>8.2f} {10:>8.2f} {11:>8.2f} {12:>8.2f}".format(
+            server, sent, failed, status, latency['min'] * 1000, latency['p50'] * 1000, latency['p95'] * 1000, latency['p99'] * 1000,
+            latency['max'] * 1000, variation * 1000, connect * 1000, tls * 1000, ttfb * 1000))
+    for server, error in sorted(pinger.errors().items()):
+        logger.warning("{0}: {1}".format(server, error))
+    if unreachable:
+        logger.error("unreachable: {0}".format(', '.join(unreachable)))
+        exit(-100)
+
+
+@cli.command(help='measure cluster throughput and latency')
+@click.option('--mix', default='jobs=4,status=2,sync=2,add=1,run=1', help='weighted mix of requests (add, run, jobs, status, sync, default: jobs=4,status=2,sync=2,add=1,run=1)')
+@click.option('-c', '--concurrency', default=8, help='number of concurrent clients (default: 8)')
+@click.option('-r', '--rate', default=0.0, help='target requests per second over all clients, 0 is as fast as possible (default: 0)')
+@click.option('-d', '--duration', default=10.0, help='seconds to run (default: 10)')
+@click.option('-n', '--requests', 'total', default=0, help='stop after this many requests (default: no limit)')
+@click.option('--no-cleanup', is_flag=True, help='keep the jobs created by the benchmark')
+@click.pass_context
+def bench(ctx, mix, concurrency, rate, duration, total, no_cleanup):
+    """
+    load test the cluster
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    try:
+        weights = parse_mix(mix)
+    except ValueError as e:
+        logger.error(e)
+        exit(-70)
+
+    # a dedicated client, requests should not be answered from the agent
+    client = Client(ctx.obj['SITE'], ctx.obj['ENTRY'], ctx.obj['SSL_VERIFY'], pool_size=concurrency)
+    load = Bench(client, weights, concurrency, rate, duration, total)
+    logger.info("running benchmark {0} with {1} clients for {2}".format(load.run_id, concurrency, "{0} requests".format(total) if total else "{0:.0f}s".format(duration)))
+    try:
+        elapsed = load.run()
+    finally:
+        # also when interrupted, the benchmark should not leave jobs behind
+        if not no_cleanup and load.created:
+            failed = load.cleanup()
+            logger.info("removed {0} benchmark jobs".format(len(load.created) - failed))
+            if failed:
+                logger.warning("could not remove {0} benchmark jobs (echo dcron-bench-{1}-*)".format(failed, load.run_id))
+    logger.info("{0} requests in {1:.2f}s ({2:.1f} req/s)".format(len(load.results), elapsed, len(load.results) / elapsed))
+    logger.info("{0:<7} {1:<15} {2:>9} {3:>8} {4:>7} {5:>8} {6:>8} {7:>8} {8:>8} {9:>8}".format(
+        'request', 'server', 'count', 'req/s', 'errors', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'mean ms'))
+    for name, server, throughput, errors, latency in load.report(elapsed):
+        logger.info("{0:<7} {1:<15} {2:>9} {3:>8.1f} {4:>6.1f}% {5:>8.2f} {6:>8.2f} {7:>8.2f} {8:>8.2f} {9:>8.2f}".format(
+            name, server or 'all', latency['count'], throughput, errors * 100, latency['p50'] * 1000, latency['p90'] * 1000,
+            latency['p99'] * 1000, latency['max'] * 1000, latency['mean'] * 1000))
+
+
+@cli.command(help='verify jobs are consistent across all nodes')
+@click.option('--strict', is_flag=True, help='also compare runtime state (pid, last run and logs)')
+@click.option('--parallel', default=8, help='maximum number of nodes queried at once (default: 8)')
+@click.pass_context
+def verify(ctx, strict, parallel):
+    """
+    compare per job digests of all nodes
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    ignore = () if strict else VOLATILE
+
+    def fetch(server):
+        r = ctx.obj['CLIENT'].get('/jobs', server=server)
+        if r.status_code != 200:
+            raise requests.exceptions.RequestException("unsuccessful request: {0} ({1})".format(r.text, r.status_code))
+        return job_digests(ctx.obj['CLIENT'].json(r), ignore)
+
+    nodes = {}
+    failed = False
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(ctx.obj['SITE'].servers)))) as executor:
+        futures = dict((executor.submit(fetch, server), server) for server in ctx.obj['SITE'].servers)
+        for future in as_completed(futures):
+            try:
+                nodes[futures[future]] = future.result()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.error("could not retrieve jobs from {0}: {1}".format(futures[future], e))
+                failed = True
+
+    digests = dict((server, site_digest(nodes[server])) for server in nodes)
+    for server in sorted(digests):
+        logger.info("{0}: {1} jobs, digest {2}".format(server, len(nodes[server]), digests[server][:16]))
+    if len(set(digests.values())) <= 1:
+        if failed:
+            exit(-41)
+        logger.info("jobs consistent across {0} nodes".format(len(nodes)))
+        return
+
+    for server, (missing, extra, divergent) in sorted(compare(nodes).items()):
+        for pattern, command in missing:
+            logger.warning("{0}: missing {1} {2}".format(server, pattern, command))
+        for pattern, command in extra:
+            logger.warning("{0}: extra {1} {2}".format(server, pattern, command))
+        for pattern, command in divergent:
+            logger.warning("{0}: divergent {1} {2}".format(server, pattern, command))
+    exit(-40)
+
+
 @cli.command(help='show cluster jobs')
+@click.option('-p', '--pattern', default=None, help='only jobs with this cron pattern', **complete_with(complete_patterns))
+@click.option('-c', '--command', default=None, help='only jobs with this command', **complete_with(complete_commands))
+@click.option('-u', '--user', default=None, help='only jobs of this user')
+@click.option('-n', '--node', default=None, help='only jobs assigned to this node')
+@click.option('--enabled/--disabled', default=None, help='only enabled or disabled jobs')
+@click.option('--from-export', default=None, help='query an export file instead of the cluster')
 @click.pass_context
-def jobs(ctx):
+def jobs(ctx, pattern, command, user, node, enabled, from_export):
     """
     report cluster jobs
     """
@@ -159,21 +495,21 @@ def jobs(ctx):
         exit(-10)
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.get("{0}/jobs".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.get("{0}/jobs".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'])
-        if len(r.json()) == 0:
+        content = query_jobs(ctx, from_export, enabled=enabled, parts=pattern, command=command, user=user, assigned_to=node)
+        if len(content) == 0:
             logger.info("currently no jobs on the cluster")
-        for line in r.json():
+        for line in content:
             logger.info("job ({0}@{1}): [{2}] {3} {4}".format(line['user'], line['assigned_to'], 'enabled' if line['enabled'] else 'disabled', line['parts'], line['command']))
+        if not from_export and not any((pattern, command, user, node, enabled is not None)):
+            update_jobs(ctx.obj['PATH'], ctx.obj['SITE'].name, content)
     except requests.exceptions.RequestException as e:
         logger.error(e)
 
 
 @cli.command(help='show running cluster jobs')
+@click.option('--from-export', default=None, help='query an export file instead of the cluster')
 @click.pass_context
-def running(ctx):
+def running(ctx, from_export):
     """
     report running cluster jobs
     """
@@ -182,14 +518,11 @@ def running(ctx):
         exit(-10)
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.get("{0}/jobs".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.get("{0}/jobs".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'])
-        if len(r.json()) == 0:
+        content = query_jobs(ctx, from_export, running=True if from_export else None)
+        if len(content) == 0:
             logger.info("currently no jobs on the cluster")
         running_jobs = []
-        for line in r.json():
+        for line in content:
             if 'pid' in line and line['pid']:
                 running_jobs.append(line)
         if len(running_jobs) == 0:
@@ -201,6 +534,77 @@ def running(ctx):
         logger.error(e)
 
 
+@cli.command(help='browse cluster jobs interactively')
+@click.pass_context
+def browse(ctx):
+    """
+    interactive view on the jobs of the cluster, the jobs are fetched once
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    if not sys.stdin.isatty() or not sys.stdout.isatty():
+        logger.error('browse needs an interactive terminal')
+        exit(-110)
+
+    try:
+        content = ctx.obj['CLIENT'].json(ctx.obj['CLIENT'].get('/jobs'))
+    except requests.exceptions.RequestException as e:
+        logger.error(e)
+        exit(-111)
+    Browser(ctx.obj['CLIENT'], content).run()
+
+
+@cli.command(help='report jobs that run late or miss runs')
+@click.option('-g', '--grace', default=60.0, help='seconds after a fire time before a run counts as missed (default: 60)')
+@click.option('-z', '--timezone', default='UTC', help='timezone of the cron patterns and of run times without one (default: UTC)')
+@click.option('-t', '--top', default=10, help='number of most delayed jobs to list (default: 10)')
+@click.option('-n', '--node', default=None, help='only jobs assigned to this node')
+@click.pass_context
+def drift(ctx, grace, timezone, top, node):
+    """
+    compare the last run of every job with the fire times of its pattern
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    try:
+        report = Drift(grace=grace, zone=timezone, top=top)
+    except ValueError as e:
+        logger.error(e)
+        exit(-120)
+
+    try:
+        content = ctx.obj['CLIENT'].json(ctx.obj['CLIENT'].get('/jobs'))
+    except requests.exceptions.RequestException as e:
+        logger.error(e)
+        exit(-121)
+
+    for job in content:
+        if not node or job.get('assigned_to') == node:
+            report.add(job)
+
+    logger.info("{0:<15} {1:>7} {2:>6} {3:>7} {4:>8} {5:>10} {6:>10} {7:>10} {8:>10}".format(
+        'node', 'jobs', 'never', 'behind', 'missed', 'p50 late', 'p95 late', 'p99 late', 'max late'))
+    for server, jobs_count, never, behind, missed, lateness in report.report():
+        if lateness['count']:
+            late = ["{0:.0f}s".format(lateness[k]) for k in ('p50', 'p95', 'p99', 'max')]
+        else:
+            late = ['-'] * 4
+        logger.info("{0:<15} {1:>7} {2:>6} {3:>7} {4:>8} {5:>10} {6:>10} {7:>10} {8:>10}".format(
+            str(server), jobs_count, never, behind, missed, *late))
+    delayed = [d for d in report.most_delayed() if d[0] or d[1]]
+    if delayed:
+        logger.info('******************************************************')
+        for missed, lateness, pattern, command, server, last_run, expected in delayed:
+            logger.info("{0} {1} ({2}): last run {3}, {4:.0f}s late, {5} missed runs (expected {6})".format(
+                pattern, command, server, last_run, lateness, missed, expected))
+    if report.invalid:
+        logger.warning("{0} jobs with an invalid pattern or last run".format(report.invalid))
+
+
 @cli.command(help='add job to cluster')
 @click.option('-p', '--pattern', default="* * * * *", help='cron pattern to use')
 @click.option('-c', '--command', help='command to execute from cron')
@@ -231,10 +635,7 @@ def add(ctx, pattern, command, enabled):
         data['disabled'] = 'true'
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.post("{0}/add_job".format(ctx.obj['URI']), data=data, verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.post("{0}/add_job".format(ctx.obj['URI']), data=data, verify=ctx.obj['SSL_VERIFY'])
+        r = ctx.obj['CLIENT'].post('/add_job', data=data)
         if r.status_code == 201:
             logger.info("successfully submitted job {0} with pattern {1} (enabled: {2})".format(command, pattern, enabled))
         else:
@@ -244,8 +645,8 @@ def add(ctx, pattern, command, enabled):
 
 
 @cli.command(help='remove job from cluster')
-@click.option('-p', '--pattern', help='cron pattern to use')
-@click.option('-c', '--command', help='command to execute from cron')
+@click.option('-p', '--pattern', help='cron pattern to use', **complete_with(complete_patterns))
+@click.option('-c', '--command', help='command to execute from cron', **complete_with(complete_commands))
 @click.pass_context
 def remove(ctx, pattern, command):
     """
@@ -269,10 +670,7 @@ def remove(ctx, pattern, command):
     }
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.post("{0}/remove_job".format(ctx.obj['URI']), data=data, verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.post("{0}/remove_job".format(ctx.obj['URI']), data=data, verify=ctx.obj['SSL_VERIFY'])
+        r = ctx.obj['CLIENT'].post('/remove_job', data=data)
         if r.status_code == 200:
             logger.info("successfully submitted remove request {0} with pattern {1}".format(command, pattern))
         else:
@@ -282,10 +680,11 @@ def remove(ctx, pattern, command):
 
 
 @cli.command(help='job details from cluster')
-@click.option('-p', '--pattern', help='cron pattern to use')
-@click.option('-c', '--command', help='command to execute from cron')
+@click.option('-p', '--pattern', help='cron pattern to use', **complete_with(complete_patterns))
+@click.option('-c', '--command', help='command to execute from cron', **complete_with(complete_commands))
+@click.option('--from-export', default=None, help='query an export file instead of the cluster')
 @click.pass_context
-def details(ctx, pattern, command):
+def details(ctx, pattern, command, from_export):
     """
     get job details
     """
@@ -298,16 +697,13 @@ def details(ctx, pattern, command):
         exit(-11)
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.get("{0}/jobs".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.get("{0}/jobs".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'])
+        content = query_jobs(ctx, from_export, parts=pattern if from_export else None, command=command if from_export else None)
 
-        if len(r.json()) == 0:
+        if len(content) == 0:
             logger.info("currently no jobs on the cluster")
         else:
             item = None
-            for line in r.json():
+            for line in content:
                 if 'parts' in line and 'command' in line and line['parts'] == pattern and line['command'] == command:
                     item = line
             if item:
@@ -330,10 +726,11 @@ def details(ctx, pattern, command):
 
 
 @cli.command(help='job logs from cluster')
-@click.option('-p', '--pattern', help='cron pattern to use')
-@click.option('-c', '--command', help='command to execute from cron')
+@click.option('-p', '--pattern', help='cron pattern to use', **complete_with(complete_patterns))
+@click.option('-c', '--command', help='command to execute from cron', **complete_with(complete_commands))
+@click.option('--from-export', default=None, help='query an export file instead of the cluster')
 @click.pass_context
-def logs(ctx, pattern, command):
+def logs(ctx, pattern, command, from_export):
     """
     get job logs
     """
@@ -346,16 +743,13 @@ def logs(ctx, pattern, command):
         exit(-11)
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.get("{0}/jobs".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.get("{0}/jobs".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'])
+        content = query_jobs(ctx, from_export, parts=pattern if from_export else None, command=command if from_export else None)
 
-        if len(r.json()) == 0:
+        if len(content) == 0:
             logger.info("currently no jobs on the cluster")
         else:
             item = None
-            for line in r.json():
+            for line in content:
                 if 'parts' in line and 'command' in line and line['parts'] == pattern and line['command'] == command:
                     item = line
             if item and 'log' in item and len(item['log']) > 0:
@@ -370,11 +764,66 @@ def logs(ctx, pattern, command):
         logger.error(e)
 
 
+@cli.command(name='grep', help='search logs of all jobs on cluster')
+@click.argument('regex')
+@click.option('-p', '--pattern', default=None, help='only search jobs with this cron pattern', **complete_with(complete_patterns))
+@click.option('-c', '--command', default=None, help='only search jobs with this command', **complete_with(complete_commands))
+@click.option('-n', '--node', default=None, help='only search jobs assigned to this node')
+@click.option('-u', '--user', default=None, help='only search jobs of this user')
+@click.option('-i', '--ignore-case', is_flag=True, help='ignore case distinctions')
+@click.option('-C', '--context', default=0, help='lines of context around matches (default: 0)')
+@click.option('-m', '--max-count', default=0, help='stop after this many matches (default: no limit)')
+@click.option('-j', '--processes', default=0, help='worker processes for large job lists (default: number of cpus)')
+@click.pass_context
+def search_logs(ctx, regex, pattern, command, node, user, ignore_case, context, max_count, processes):
+    """
+    search job logs
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        re.compile(regex, flags)
+    except re.error as e:
+        logger.error("invalid regular expression: {0}".format(e))
+        exit(-61)
+
+    try:
+        r = ctx.obj['CLIENT'].get('/jobs')
+        content = ctx.obj['CLIENT'].json(r)
+    except requests.exceptions.RequestException as e:
+        logger.error(e)
+        exit(-62)
+
+    selected = [job for job in content if
+                (pattern is None or job.get('parts') == pattern) and
+                (command is None or job.get('command') == command) and
+                (node is None or job.get('assigned_to') == node) and
+                (user is None or job.get('user') == user)]
+    found = 0
+    for job_pattern, job_command, job_node, number, before, line, after in search(selected, regex, flags, context, max_count, processes):
+        if context and found:
+            logger.info('--')
+        for offset, text in enumerate(before):
+            logger.info("{0} {1} {2}-{3}-{4}".format(job_node, job_pattern, job_command, number - len(before) + offset, text))
+        logger.info("{0} {1} {2}:{3}:{4}".format(job_node, job_pattern, job_command, number, line))
+        for offset, text in enumerate(after):
+            logger.info("{0} {1} {2}-{3}-{4}".format(job_node, job_pattern, job_command, number + offset + 1, text))
+        found += 1
+    if not found:
+        logger.info("no matches in logs of {0} jobs".format(len(selected)))
+        exit(-60)
+
+
 @cli.command(help='run defined job on cluster')
-@click.option('-p', '--pattern', help='cron pattern to use')
-@click.option('-c', '--command', help='command to execute from cron')
+@click.option('-p', '--pattern', help='cron pattern to use', **complete_with(complete_patterns))
+@click.option('-c', '--command', help='command to execute from cron', **complete_with(complete_commands))
+@click.option('-w', '--wait', is_flag=True, help='wait until the job finished running')
+@click.option('-t', '--timeout', default=600.0, help='seconds to wait at most, 0 waits forever (default: 600)')
 @click.pass_context
-def run(ctx, pattern, command):
+def run(ctx, pattern, command, wait, timeout):
     """
     run job
     """
@@ -396,12 +845,16 @@ def run(ctx, pattern, command):
     }
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.post("{0}/run_job".format(ctx.obj['URI']), data=data, verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.post("{0}/run_job".format(ctx.obj['URI']), data=data, verify=ctx.obj['SSL_VERIFY'])
+        waiter = JobWaiter(ctx.obj['CLIENT'])
+        if wait:
+            # the last run before submitting tells us when the requested run finished
+            baseline = (waiter.jobs([(pattern, command)]) or {}).get((pattern, command))
+            waiter.add(pattern, command, 'run', baseline)
+        r = ctx.obj['CLIENT'].post('/run_job', data=data)
         if r.status_code == 202:
             logger.info("successfully submitted run request {0} with pattern {1}".format(command, pattern))
+            if wait:
+                exit(waiter.wait(timeout))
         else:
             logger.warning("unsuccessful request: {0} ({1})".format(r.text, r.status_code))
     except requests.exceptions.RequestException as e:
@@ -409,10 +862,12 @@ def run(ctx, pattern, command):
 
 
 @cli.command(help='kill defined job on cluster')
-@click.option('-p', '--pattern', help='cron pattern to use')
-@click.option('-c', '--command', help='command to execute from cron')
+@click.option('-p', '--pattern', help='cron pattern to use', **complete_with(complete_patterns))
+@click.option('-c', '--command', help='command to execute from cron', **complete_with(complete_commands))
+@click.option('-w', '--wait', is_flag=True, help='wait until the job stopped running')
+@click.option('-t', '--timeout', default=600.0, help='seconds to wait at most, 0 waits forever (default: 600)')
 @click.pass_context
-def kill(ctx, pattern, command):
+def kill(ctx, pattern, command, wait, timeout):
     """
     kill job
     """
@@ -434,18 +889,54 @@ def kill(ctx, pattern, command):
     }
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.post("{0}/kill_job".format(ctx.obj['URI']), data=data, verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.post("{0}/kill_job".format(ctx.obj['URI']), data=data, verify=ctx.obj['SSL_VERIFY'])
+        r = ctx.obj['CLIENT'].post('/kill_job', data=data)
         if r.status_code == 202:
             logger.info("successfully submitted run request {0} with pattern {1}".format(command, pattern))
+            if wait:
+                waiter = JobWaiter(ctx.obj['CLIENT'])
+                waiter.add(pattern, command, 'kill')
+                exit(waiter.wait(timeout))
         else:
             logger.warning("unsuccessful request: {0} ({1})".format(r.text, r.status_code))
     except requests.exceptions.RequestException as e:
         logger.error(e)
 
 
+@cli.command(help='wait until jobs on cluster are not running')
+@click.option('-j', '--job', 'jobs', nargs=2, multiple=True, help='cron pattern and command of a job to wait for (repeatable)')
+@click.option('--all-running', is_flag=True, help='wait for every job that is currently running')
+@click.option('-t', '--timeout', default=600.0, help='seconds to wait at most, 0 waits forever (default: 600)')
+@click.pass_context
+def wait(ctx, jobs, all_running, timeout):
+    """
+    wait for jobs
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    for pattern, _ in jobs:
+        if not len(pattern.split(' ')) == 5:
+            logger.error('pattern not valid, should follow cron pattern (* * * * *)')
+            exit(-11)
+
+    try:
+        waiter = JobWaiter(ctx.obj['CLIENT'])
+        for pattern, command in jobs:
+            waiter.add(pattern, command)
+        if all_running:
+            for key, job in (waiter.jobs() or {}).items():
+                if job.get('pid') and key not in jobs:
+                    waiter.add(key[0], key[1])
+        if len(waiter.waiters) == 0:
+            logger.info("no jobs to wait for")
+            return
+        logger.info("waiting for {0} jobs".format(len(waiter.waiters)))
+        exit(waiter.wait(timeout))
+    except requests.exceptions.RequestException as e:
+        logger.error(e)
+
+
 @cli.command(help='export jobs on cluster')
 @click.option('-f', '--file-name', help='export current jobs to file')
 @click.option('--force', is_flag=True, help='overwrite if the file exists')
@@ -458,14 +949,12 @@ def export(ctx, file_name, force):
         logger.error('could not locate configuration object')
         exit(-10)
 
-    if ctx.obj['SITE'].username:
-        r = requests.get("{0}/export".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-    else:
-        r = requests.get("{0}/export".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'])
-    if len(r.json()) == 0:
+    r = ctx.obj['CLIENT'].get('/export')
+    content = ctx.obj['CLIENT'].json(r)
+    if len(content) == 0:
         logger.warning("no jobs found for exporting")
     else:
-        logger.debug("got export data: {0}".format(r.json()))
+        logger.debug("got export data: {0}".format(content))
         directory = os.path.dirname(file_name)
         if not os.path.exists(directory):
             os.makedirs(directory)
@@ -473,40 +962,66 @@ def export(ctx, file_name, force):
             if force:
                 os.remove(file_name)
                 with open(file_name, 'wb') as fp:
-                    fp.write(r.content)
+                    fp.write(json_body(r, content))
                 logger.info("successfully writen export to {0}".format(file_name))
             else:
                 logger.error("file already exists (use --force to overwrite")
                 exit(-33)
         else:
             with open(file_name, 'wb') as fp:
-                fp.write(r.content)
+                fp.write(json_body(r, content))
             logger.info("successfully writen export to {0}".format(file_name))
 
 
 @cli.command(name='import', help='import jobs on cluster')
 @click.option('-f', '--file-name', help='import jobs from file to cluster')
+@click.option('--dry-run', is_flag=True, default=False, help='only validate the file and report what would be imported')
+@click.option('--no-preflight', is_flag=True, default=False, help='upload the file as is without validation')
+@click.option('--include-existing', is_flag=True, default=False, help='also upload jobs that already exist on the cluster')
 @click.pass_context
-def import_data(ctx, file_name):
+def import_data(ctx, file_name, dry_run, no_preflight, include_existing):
     """
-    export jobs
+    import jobs, the file is validated and deduplicated before uploading
     """
     if not ctx.obj['SITE']:
         logger.error('could not locate configuration object')
         exit(-10)
 
-    if not os.path.exists(file_name):
+    if not file_name or not os.path.exists(file_name):
         logger.error("could not locate file for importing {0}".format(file_name))
         exit(-34)
 
-    with open(file_name, 'rb') as fp:
-        data = fp.readlines()
+    if no_preflight:
+        with open(file_name, 'rb') as fp:
+            data = fp.readlines()
+    else:
+        existing = None
+        if not include_existing:
+            try:
+                r = ctx.obj['CLIENT'].get('/jobs')
+                if r.status_code == 200:
+                    existing = existing_digests(ctx.obj['CLIENT'].json(r))
+                else:
+                    logger.warning("could not retrieve current jobs, existing jobs are not skipped: {0} ({1})".format(r.text, r.status_code))
+            except requests.exceptions.RequestException as e:
+                logger.warning("could not retrieve current jobs, existing jobs are not skipped: {0}".format(e))
+        try:
+            with open(file_name, 'rb') as source, tempfile.TemporaryFile() as target:
+                report = preflight(source, None if dry_run else target, existing)
+                target.seek(0)
+                data = target.readlines()
+        except RecordError as e:
+            logger.error(e)
+            exit(-38)
+        report.log(logger)
+        if dry_run:
+            return
+        if not report.kept:
+            logger.info("nothing to import")
+            return
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.post("{0}/import".format(ctx.obj['URI']), data={'payload': data}, verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.post("{0}/import".format(ctx.obj['URI']), data={'payload': data}, verify=ctx.obj['SSL_VERIFY'])
+        r = ctx.obj['CLIENT'].post('/import', data={'payload': data})
         if r.status_code == 200:
             logger.info("successfully imported data")
         else:
@@ -515,6 +1030,117 @@ def import_data(ctx, file_name):
         logger.error(e)
 
 
+@cli.group(help='incremental job snapshots')
+@click.pass_context
+def snapshot(ctx):
+    """
+    manage local job snapshots, stored under the configuration folder per site
+    """
+    if not ctx.obj['SITE']:
+        logger.error('could not locate configuration object')
+        exit(-10)
+
+    ctx.obj['SNAPSHOTS'] = SnapshotStore(join(os.path.dirname(ctx.obj['PATH']), 'snapshots', ctx.obj['SITE'].name))
+
+
+@snapshot.command(name='create', help='snapshot jobs on cluster')
+@click.option('-n', '--name', default=None, help='name of the snapshot (default: current utc time)')
+@click.pass_context
+def snapshot_create(ctx, name):
+    """
+    create snapshot
+    """
+    try:
+        if name:
+            # fail before exporting the jobs
+            ctx.obj['SNAPSHOTS'].manifest_path(name)
+        r = ctx.obj['CLIENT'].get('/export')
+        if r.status_code != 200:
+            logger.warning("unsuccessful request: {0} ({1})".format(r.text, r.status_code))
+            exit(-35)
+        manifest, stored = ctx.obj['SNAPSHOTS'].create(ctx.obj['CLIENT'].json(r), name)
+        logger.info("successfully created snapshot {0} with {1} jobs ({2} changed)".format(manifest['name'], len(manifest['jobs']), stored))
+    except ValueError as e:
+        logger.error(e)
+        exit(-36)
+    except requests.exceptions.RequestException as e:
+        logger.error(e)
+
+
+@snapshot.command(name='ls', help='list snapshots')
+@click.pass_context
+def snapshot_list(ctx):
+    """
+    list snapshots
+    """
+    manifests = ctx.obj['SNAPSHOTS'].list()
+    if len(manifests) == 0:
+        logger.info("no snapshots for site {0}".format(ctx.obj['SITE'].name))
+    for manifest in manifests:
+        logger.info("{0} (created {1}): {2} jobs".format(manifest['name'], manifest['created'], len(manifest['jobs'])))
+
+
+@snapshot.command(name='diff', help='compare two snapshots')
+@click.argument('old')
+@click.argument('new')
+@click.pass_context
+def snapshot_diff(ctx, old, new):
+    """
+    diff snapshots
+    """
+    try:
+        added, removed, changed = ctx.obj['SNAPSHOTS'].diff(old, new)
+    except KeyError as e:
+        logger.error(e.args[0])
+        exit(-37)
+    if len(added) + len(removed) + len(changed) == 0:
+        logger.info("no differences between {0} and {1}".format(old, new))
+    for pattern, command in added:
+        logger.info("+ {0} {1}".format(pattern, command))
+    for pattern, command in removed:
+        logger.info("- {0} {1}".format(pattern, command))
+    for pattern, command in changed:
+        logger.info("~ {0} {1}".format(pattern, command))
+
+
+@snapshot.command(name='restore', help='import a snapshot on cluster')
+@click.argument('name')
+@click.pass_context
+def snapshot_restore(ctx, name):
+    """
+    restore snapshot
+    """
+    try:
+        data = [json.dumps(ctx.obj['SNAPSHOTS'].jobs(name))]
+    except KeyError as e:
+        logger.error(e.args[0])
+        exit(-37)
+
+    try:
+        r = ctx.obj['CLIENT'].post('/import', data={'payload': data})
+        if r.status_code == 200:
+            logger.info("successfully restored snapshot {0}".format(name))
+        else:
+            logger.warning("unsuccessful request: {0} ({1})".format(r.text, r.status_code))
+    except requests.exceptions.RequestException as e:
+        logger.error(e)
+
+
+@snapshot.command(name='rm', help='remove a snapshot')
+@click.argument('name')
+@click.pass_context
+def snapshot_remove(ctx, name):
+    """
+    remove snapshot
+    """
+    try:
+        removed = ctx.obj['SNAPSHOTS'].remove(name)
+    except KeyError as e:
+        logger.error(e.args[0])
+        exit(-37)
+    logger.info("removed snapshot {0} ({1} objects released)".format(name, removed))
+
+
 @cli.command(name='rebalance', help='re-balance jobs on cluster')
 @click.pass_context
 def re_balance(ctx):
@@ -526,10 +1152,7 @@ def re_balance(ctx):
         exit(-10)
 
     try:
-        if ctx.obj['SITE'].username:
-            r = requests.post("{0}/re-balance".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'], auth=(ctx.obj['SITE'].username, ctx.obj['SITE'].password))
-        else:
-            r = requests.post("{0}/re-balance".format(ctx.obj['URI']), verify=ctx.obj['SSL_VERIFY'])
+        r = ctx.obj['CLIENT'].post('/re-balance')
         if r.status_code == 200:
             logger.info("successfully send re-balance request")
         else:
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+import random
+import threading
+import uuid
+
+from itertools import count
+from time import perf_counter
+
+import requests
+
+from cli.stats import summary
+
+# name: (method, endpoint, expected status)
+ENDPOINTS = {
+    'add': ('POST', '/add_job', 201),
+    'run': ('POST', '/run_job', 202),
+    'jobs': ('GET', '/jobs', 200),
+    'status': ('GET', '/status', 200),
+    'sync': ('GET', '/cron_in_sync', 200),
+}
+
+# pattern of jobs created by the benchmark, far from firing on its own
+PATTERN = '0 0 1 1 *'
+
+
+def parse_mix(mix):
+    """
+    :param mix: comma separated name=weight pairs (e.g. jobs=4,status=2,add=1)
+    :return: list of (name, weight)
+    """
+    weights = []
+    for part in mix.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError("unknown endpoint {0} (choose from {1})".format(name, ', '.join(sorted(ENDPOINTS))))
+        weights.append((name, float(weight or 1)))
+    return weights
+
+
+class Bench(object):
+    """
+    Replays a weighted mix of requests against all servers of a site at a target concurrency and (optionally) rate
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, client, mix, concurrency=8, rate=0.0, duration=10.0, total=0):
+        self.client = client
+        self.names = [name for name, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.total = total
+        self.run_id = uuid.uuid4().hex[:8]
+        self.lock = threading.Lock()
+        self.sequence = count()
+        self.created = []
+        self.results = []
+        # set to stop all workers, e.g. when the benchmark is interrupted
+        self.stopping = threading.Event()
+
+    def job(self, n):
+        return {
+            'command': "echo dcron-bench-{0}-{1}".format(self.run_id, n),
+            'minute': '0', 'hour': '0', 'dom': '1', 'month': '1', 'dow': '*',
+            'disabled': 'true',
+        }
+
+    def request(self, name, server):
+        method, endpoint, expected = ENDPOINTS[name]
+        data = None
+        if name == 'add':
+            data = self.job(next(self.sequence))
+        elif name == 'run':
+            with self.lock:
+                data = random.choice(self.created) if self.created else None
+            if data is None:
+                name, data = 'add', self.job(next(self.sequence))
+                method, endpoint, expected = ENDPOINTS['add']
+        start = perf_counter()
+        try:
+            r = self.client.request(method, endpoint, server, data=data)
+            r.content
+            ok = r.status_code == expected
+        except requests.exceptions.RequestException:
+            ok = False
+        latency = perf_counter() - start
+        with self.lock:
+            self.results.append((name, server, latency, ok))
+            if name == 'add' and ok:
+                self.created.append(data)
+
+    def worker(self, index, start, deadline, issued):
+        servers = sorted(self.client.site.servers)
+        rng = random.Random(index)
+        while not self.stopping.is_set():
+            n = next(issued)
+            if self.total and n >= self.total:
+                return
+            if self.rate:
+                # every request has a fixed slot in the schedule, shared by all workers
+                delay = start + n / self.rate - perf_counter()
+                if delay > 0 and self.stopping.wait(delay):
+                    return
+            if perf_counter() >= deadline:
+                return
+            name = self.pick(rng)
+            self.request(name, servers[n % len(servers)])
+
+    def pick(self, rng):
+        point = rng.uniform(0, sum(self.weights))
+        for name, weight in zip(self.names, self.weights):
+            point -= weight
+            if point <= 0:
+                return name
+        return self.names[-1]
+
+    def run(self):
+        """
+        :return: elapsed seconds
+        """
+        issued = count()
+        start = perf_counter()
+        deadline = start + self.duration if self.duration else float('inf')
+        threads = [threading.Thread(target=self.worker, args=(i, start, deadline, issued), daemon=True) for i in range(self.concurrency)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            # when interrupted, requests in flight finish so every created job is known to cleanup()
+            self.stopping.set()
+            for thread in threads:
+                if thread.is_alive():
+                    thread.join()
+        return perf_counter() - start
+
+    def cleanup(self):
+        """
+        remove every job the benchmark created
+        :return: number of jobs that could not be removed
+        """
+        failed = 0
+        for data in self.created:
+            data = dict((k, v) for k, v in data.items() if k != 'disabled')
+            try:
+                if self.client.post('/remove_job', data=data).status_code != 200:
+                    failed += 1
+            except requests.exceptions.RequestException:
+                failed += 1
+        return failed
+
+    def report(self, elapsed):
+        """
+        :return: list of (endpoint, server, requests per second, error rate, latency summary), totals per endpoint
+                 have server None
+        """
+        groups = {}
+        for name, server, latency, ok in self.results:
+            for key in ((name, None), (name, server)):
+                groups.setdefault(key, []).append((latency, ok))
+        rows = []
+        for (name, server) in sorted(groups, key=lambda k: (k[0], k[1] or '')):
+            samples = groups[(name, server)]
+            errors = sum(1 for _, ok in samples if not ok)
+            rows.append((name, server, len(samples) / elapsed, errors / float(len(samples)), summary([l for l, _ in samples])))
+        return rows
@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import requests
+
+try:
+    import curses
+except ImportError:  # pragma: no cover
+    curses = None
+
+# name: (field, reverse)
+SORTS = (
+    ('fetched', None, False),
+    ('node', 'assigned_to', False),
+    ('user', 'user', False),
+    ('last run', 'last_run', True),
+)
+# filter prefixes and the fields they match
+FIELDS = {'node:': 'assigned_to', 'user:': 'user', 'pattern:': 'parts', 'command:': 'command'}
+
+
+def job_form(job):
+    """
+    :return: form identifying a job for the run and kill endpoints
+    """
+    fields = job['parts'].split(' ')
+    return {'command': job['command'], 'minute': fields[0], 'hour': fields[1], 'dom': fields[2], 'month': fields[3], 'dow': fields[4]}
+
+
+def state(job):
+    if job.get('pid'):
+        return 'running'
+    return 'enabled' if job.get('enabled') else 'disabled'
+
+
+class JobList(object):
+    """
+    In memory index over a fetched job list, filtering and sorting only work on row numbers, rows are formatted
+    when they are shown
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.text = ["{0} {1} {2} {3} {4}".format(j.get('parts'), j.get('command'), j.get('user'), j.get('assigned_to'), state(j)).lower()
+                     for j in jobs]
+        self.query = ''
+        self.matches = list(range(len(jobs)))
+        self.sort = 0
+        self.reverse = False
+        self.ranks = {}
+        self.view = self.matches
+
+    def _rank(self):
+        _, field, reverse = SORTS[self.sort]
+        if field is None:
+            return None
+        if field not in self.ranks:
+            order = sorted(range(len(self.jobs)), key=lambda i: str(self.jobs[i].get(field) or ''), reverse=reverse)
+            rank = [0] * len(order)
+            for position, i in enumerate(order):
+                rank[i] = position
+            self.ranks[field] = rank
+        return self.ranks[field]
+
+    def _order(self):
+        rank = self._rank()
+        view = sorted(self.matches, key=rank.__getitem__) if rank else list(self.matches)
+        self.view = view[::-1] if self.reverse else view
+
+    @staticmethod
+    def terms(query):
+        """
+        :return: list of (field, value), field is None for terms matching the whole row
+        """
+        terms = []
+        for term in query.lower().split():
+            prefix = next((p for p in FIELDS if term.startswith(p)), None)
+            terms.append((FIELDS[prefix], term[len(prefix):]) if prefix else (None, term))
+        return terms
+
+    def narrows(self, terms):
+        """
+        :return: True when every current term is still present as the start of a new term of the same kind, so the
+                 new query can only remove matches
+        """
+        return all(any(f == field and v.startswith(value) for f, v in terms) for field, value in self.terms(self.query))
+
+    def filter(self, query):
+        """
+        :param query: space separated terms that all have to match, node:, user:, pattern: and command: only match
+                      that field
+        """
+        terms = self.terms(query)
+        candidates = self.matches if self.narrows(terms) else range(len(self.jobs))
+        plain = [v for f, v in terms if f is None]
+        fields = [(f, v) for f, v in terms if f is not None]
+        self.matches = [i for i in candidates
+                        if all(t in self.text[i] for t in plain)
+                        and all(v in str(self.jobs[i].get(f) or '').lower() for f, v in fields)]
+        self.query = query
+        self._order()
+
+    def cycle_sort(self):
+        self.sort = (self.sort + 1) % len(SORTS)
+        self._order()
+        return SORTS[self.sort][0]
+
+    def toggle_reverse(self):
+        self.reverse = not self.reverse
+        self._order()
+
+    def __len__(self):
+        return len(self.view)
+
+    def job(self, position):
+        return self.jobs[self.view[position]]
+
+    def row(self, position, width):
+        job = self.job(position)
+        marker = {'running': 'R', 'disabled': '-'}.get(state(job), ' ')
+        line = "{0} {1:<15} {2:<10} {3:<19} {4:<15} {5}".format(
+            marker, str(job.get('assigned_to')), str(job.get('user')), str(job.get('last_run') or '-')[:19], job.get('parts'), job.get('command'))
+        return line[:width]
+
+    def update(self, jobs):
+        """
+        replace the job list, the current filter and sort are kept
+        """
+        query, sort, reverse = self.query, self.sort, self.reverse
+        self.__init__(jobs)
+        self.sort, self.reverse = sort, reverse
+        self.filter(query)
+
+
+def details(job):
+    """
+    :return: lines describing a job, as the details command shows them
+    """
+    return [
+        "Job {0} {1} details:".format(job.get('parts'), job.get('command')),
+        "- assigned to node: {0}".format(job.get('assigned_to')),
+        "- last run        : {0}".format(job.get('last_run')),
+        "- running pid     : {0}".format(job.get('pid')),
+        "- enabled         : {0}".format(job.get('enabled')),
+        "- user            : {0}".format(job.get('user')),
+        "- cron            : {0}".format(job.get('cron')),
+    ]
+
+
+class Browser(object):
+    """
+    Curses view on a JobList, keys: arrows/pgup/pgdn/home/end move, / filters, s sorts, S reverses, enter shows
+    details, l shows logs, R runs, K kills, g reloads the jobs and q quits
+    """
+
+    def __init__(self, client, jobs):
+        self.client = client
+        self.list = JobList(jobs)
+        self.cursor = 0
+        self.top = 0
+        self.message = ''
+        self.pane = None
+        self.pane_top = 0
+
+    def reload(self):
+        r = self.client.get('/jobs')
+        self.list.update(self.client.json(r))
+        self.cursor = min(self.cursor, max(len(self.list) - 1, 0))
+        return "{0} jobs".format(len(self.list.jobs))
+
+    def action(self, endpoint, job):
+        r = self.client.post(endpoint, data=job_form(job))
+        if r.status_code == 202:
+            return "submitted {0} for {1} {2}".format(endpoint, job['parts'], job['command'])
+        return "unsuccessful request: {0} ({1})".format(r.text.strip(), r.status_code)
+
+    def draw(self, screen):
+        height, width = screen.getmaxyx()
+        screen.erase()
+        rows = max(height - 2, 1)
+        if self.pane is not None:
+            title, lines = self.pane
+            screen.addnstr(0, 0, title, width - 1, curses.A_REVERSE)
+            for y, line in enumerate(lines[self.pane_top:self.pane_top + rows]):
+                screen.addnstr(y + 1, 0, line, width - 1)
+            screen.addnstr(height - 1, 0, 'q: back', width - 1)
+            screen.refresh()
+            return
+        # keep the cursor in the visible window, only these rows are formatted
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + rows:
+            self.top = self.cursor - rows + 1
+        header = "{0}/{1} jobs  sort: {2}{3}  filter: {4}".format(
+            len(self.list), len(self.list.jobs), SORTS[self.list.sort][0], ' (reversed)' if self.list.reverse else '', self.list.query)
+        screen.addnstr(0, 0, header.ljust(width), width - 1, curses.A_REVERSE)
+        for y, position in enumerate(range(self.top, min(self.top + rows, len(self.list)))):
+            row = self.list.row(position, width - 1)
+            if position == self.cursor:
+                screen.addnstr(y + 1, 0, row.ljust(width - 1), width - 1, curses.A_REVERSE)
+            else:
+                screen.addnstr(y + 1, 0, row, width - 1)
+        screen.addnstr(height - 1, 0, self.message or '/ filter  s sort  S reverse  enter details  l logs  R run  K kill  g reload  q quit', width - 1)
+        screen.refresh()
+
+    def prompt(self, screen, text, incremental=None):
+        """
+        read a line on the status line, incremental is called with the text after every key
+        """
+        value = ''
+        curses.curs_set(1)
+        try:
+            while True:
+                self.message = "{0}{1}".format(text, value)
+                self.draw(screen)
+                key = screen.getch()
+                if key in (10, 13, curses.KEY_ENTER):
+                    return value
+                if key == 27:
+                    return None
+                if key in (curses.KEY_BACKSPACE, 127, 8):
+                    value = value[:-1]
+                elif 32 <= key < 127:
+                    value += chr(key)
+                else:
+                    continue
+                if incremental:
+                    incremental(value)
+                    self.cursor = 0
+        finally:
+            curses.curs_set(0)
+            self.message = ''
+
+    def confirm(self, screen, text):
+        self.message = "{0} (y/n)".format(text)
+        self.draw(screen)
+        return screen.getch() in (ord('y'), ord('Y'))
+
+    def main(self, screen):
+        curses.curs_set(0)
+        screen.keypad(True)
+        while True:
+            self.draw(screen)
+            key = screen.getch()
+            rows = max(screen.getmaxyx()[0] - 2, 1)
+            if self.pane is not None:
+                if key in (ord('q'), 27, curses.KEY_LEFT):
+                    self.pane = None
+                elif key in (curses.KEY_DOWN, ord('j')):
+                    self.pane_top = min(self.pane_top + 1, max(len(self.pane[1]) - rows, 0))
+                elif key in (curses.KEY_UP, ord('k')):
+                    self.pane_top = max(self.pane_top - 1, 0)
+                continue
+            self.message = ''
+            if key == ord('q'):
+                return
+            elif key in (curses.KEY_DOWN, ord('j')):
+                self.cursor += 1
+            elif key in (curses.KEY_UP, ord('k')):
+                self.cursor -= 1
+            elif key == curses.KEY_NPAGE:
+                self.cursor += rows
+            elif key == curses.KEY_PPAGE:
+                self.cursor -= rows
+            elif key == curses.KEY_HOME:
+                self.cursor = 0
+            elif key == curses.KEY_END:
+                self.cursor = len(self.list) - 1
+            elif key == ord('/'):
+                previous = self.list.query
+                if self.prompt(screen, '/', self.list.filter) is None:
+                    self.list.filter(previous)
+            elif key == ord('s'):
+                self.message = "sorted by {0}".format(self.list.cycle_sort())
+            elif key == ord('S'):
+                self.list.toggle_reverse()
+            elif key == ord('g'):
+                try:
+                    self.message = self.reload()
+                except requests.exceptions.RequestException as e:
+                    self.message = str(e)
+            elif len(self.list) and key in (10, 13, curses.KEY_ENTER, curses.KEY_RIGHT, ord('l'), ord('R'), ord('K')):
+                job = self.list.job(self.cursor)
+                if key == ord('l'):
+                    self.pane, self.pane_top = ("Job {0} {1} logs".format(job['parts'], job['command']), list(job.get('log') or ['no logs'])), 0
+                elif key in (ord('R'), ord('K')):
+                    endpoint = '/run_job' if key == ord('R') else '/kill_job'
+                    if self.confirm(screen, "{0} {1} {2}?".format('run' if key == ord('R') else 'kill', job['parts'], job['command'])):
+                        try:
+                            self.message = self.action(endpoint, job)
+                        except requests.exceptions.RequestException as e:
+                            self.message = str(e)
+                    else:
+                        self.message = ''
+                else:
+                    self.pane, self.pane_top = ('details', details(job)), 0
+            self.cursor = max(0, min(self.cursor, len(self.list) - 1))
+
+    def run(self):
+        curses.wrapper(self.main)
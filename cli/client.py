@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from functools import partial
+from time import perf_counter
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from cli.timings import TimedAdapter
+from cli.wire import ENDPOINTS, headers, loads
+
+
+class Client(object):
+    """
+    Connection to the servers of a site, every request a command issues goes through a client so connections
+    are pooled and (when enabled) timed.
+    """
+
+    def __init__(self, site, entry, verify=True, timings=None, agent=None, pool_size=None, distributor=None):
+        self.site = site
+        self.entry = entry
+        self.distributor = distributor
+        self.prefix = 'https' if site.ssl else 'http'
+        self.timings = timings
+        self.agent = agent
+        self.session = requests.Session()
+        self.session.verify = verify
+        if site.username:
+            self.session.auth = (site.username, site.password)
+        if timings or pool_size:
+            adapter = TimedAdapter if timings else HTTPAdapter
+            kwargs = {'pool_maxsize': pool_size} if pool_size else {}
+            self.session.mount('http://', adapter(**kwargs))
+            self.session.mount('https://', adapter(**kwargs))
+
+    def uri(self, server=None):
+        return "{0}://{1}:{2}".format(self.prefix, server or self.entry, self.site.port)
+
+    def request(self, method, endpoint, server=None, **kwargs):
+        """
+        :param method: http method
+        :param endpoint: endpoint on the server (e.g. /jobs)
+        :param server: server to send the request to (default: entry server, or any server for reads when
+                       read distribution is enabled)
+        :return: response
+        """
+        if self.distributor and method == 'GET' and not server:
+            server = self.distributor.pick(endpoint)
+            if server and server != self.entry:
+                try:
+                    r = self.send(method, endpoint, server, **kwargs)
+                except requests.exceptions.ConnectionError:
+                    # reads can be answered by any server, fall back to the entry server
+                    r = self.send(method, endpoint, None, **kwargs)
+            else:
+                r = self.send(method, endpoint, server, **kwargs)
+            self.distributor.observe(endpoint, r)
+            return r
+        return self.send(method, endpoint, server, **kwargs)
+
+    def send(self, method, endpoint, server=None, **kwargs):
+        url = "{0}{1}".format(self.uri(server), endpoint)
+        if method == 'GET' and 'headers' not in kwargs and endpoint in ENDPOINTS:
+            kwargs['headers'] = headers(endpoint)
+        if self.agent:
+            send = partial(self.agent.request, method, endpoint, server or self.entry, kwargs.get('data'), url)
+        elif self.timings:
+            send = partial(self.session.request, method, url, stream=True, **kwargs)
+        else:
+            return self.session.request(method, url, **kwargs)
+        if not self.timings:
+            return send()
+        return self.timings.request(send, method, server or self.entry, endpoint)
+
+    def get(self, endpoint, server=None, **kwargs):
+        return self.request('GET', endpoint, server, **kwargs)
+
+    def post(self, endpoint, data=None, server=None, **kwargs):
+        return self.request('POST', endpoint, server, data=data, **kwargs)
+
+    @staticmethod
+    def json(r):
+        """
+        decode a json (or msgpack) response, decode time is added to the timing of the request
+        """
+        if not hasattr(r, 'timing'):
+            return loads(r)
+        start = perf_counter()
+        try:
+            return loads(r)
+        finally:
+            r.timing['decode'] += perf_counter() - start
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import shlex
+import subprocess
+import sys
+
+from os.path import dirname, exists, getmtime, join
+from pathlib import Path
+from time import time
+
+from cli.configuration import Configuration
+
+DEFAULT_CONFIG = join(str(Path.home()), '.dcron', 'sites.json')
+
+# options of the cli group taking a value, needed to find the sub command without loading the application
+ROOT_OPTIONS = ('-c', '--config-file', '-s', '--site-name', '-m', '--selection-mechanism', '-r', '--read-distribution',
+                '--profile', '--agent-socket')
+# sub commands completing -p/--pattern and -c/--command from the index
+JOB_COMMANDS = ('details', 'grep', 'jobs', 'kill', 'logs', 'remove', 'run')
+
+# seconds after which the jobs of a site are refreshed in the background
+MAX_AGE = 300
+# seconds before another background refresh may be started
+RETRY = 60
+
+
+def index_path(config_file):
+    return join(dirname(config_file), 'completion.json')
+
+
+def read_index(config_file):
+    """
+    read the completion index, site names and servers are taken from the configuration whenever it changed
+    """
+    path = index_path(config_file)
+    index = {'config': None, 'sites': {}}
+    if exists(path):
+        try:
+            with open(path, 'r') as fp:
+                index = json.load(fp)
+        except ValueError:
+            pass
+    if exists(config_file) and index['config'] != getmtime(config_file):
+        sites = {}
+        for site in Configuration(config_file, create=False).sites:
+            sites[site.name] = index['sites'].get(site.name, {'patterns': [], 'commands': [], 'updated': 0, 'refreshing': 0})
+            sites[site.name]['servers'] = list(site.servers)
+        index = {'config': getmtime(config_file), 'sites': sites}
+        write_index(config_file, index)
+    return index
+
+
+def write_index(config_file, index):
+    path = index_path(config_file)
+    if not exists(dirname(path)):
+        return
+    tmp = "{0}.{1}.tmp".format(path, os.getpid())
+    with open(tmp, 'w') as fp:
+        json.dump(index, fp)
+    os.replace(tmp, path)
+
+
+def update_jobs(config_file, site_name, jobs):
+    """
+    store the patterns and commands of the jobs of a site
+    """
+    index = read_index(config_file)
+    if site_name not in index['sites']:
+        return
+    index['sites'][site_name].update({
+        'patterns': sorted(set(j.get('parts') for j in jobs if j.get('parts'))),
+        'commands': sorted(set(j.get('command') for j in jobs if j.get('command'))),
+        'updated': time(),
+    })
+    write_index(config_file, index)
+
+
+def refresh(config_file, site_name):
+    """
+    start a detached process refreshing the jobs of a site when they are stale
+    """
+    index = read_index(config_file)
+    site = index['sites'].get(site_name)
+    now = time()
+    if not site or now - site['updated'] < MAX_AGE or now - site['refreshing'] < RETRY:
+        return
+    site['refreshing'] = now
+    write_index(config_file, index)
+    subprocess.Popen([sys.executable, '-m', 'cli.completion', config_file, site_name],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True, cwd=dirname(dirname(os.path.abspath(__file__))))
+
+
+def selected(ctx):
+    """
+    :return: (config file, site name) of the invocation being completed
+    """
+    params = ctx.find_root().params
+    return params.get('config_file') or DEFAULT_CONFIG, params.get('site_name') or 'default'
+
+
+def complete_sites(ctx, incomplete):
+    config_file, _ = selected(ctx)
+    return [name for name in sorted(read_index(config_file)['sites']) if name.startswith(incomplete)]
+
+
+def complete_servers(ctx, incomplete):
+    config_file, site_name = selected(ctx)
+    site = read_index(config_file)['sites'].get(site_name, {})
+    return [s for s in ['first', 'last', 'random'] + site.get('servers', []) if s.startswith(incomplete)]
+
+
+def completing_shell(environ=None):
+    """
+    :return: shell a completion is requested for (bash, zsh, fish), None when not completing
+    """
+    for key, value in (environ or os.environ).items():
+        if key.startswith('_') and key.endswith('_COMPLETE'):
+            # click 8 uses bash_complete, zsh_complete, ..., click 7 complete (bash) and complete_zsh
+            if value == 'complete':
+                return 'bash'
+            return value.replace('_complete', '').replace('complete_', '')
+    return None
+
+
+def shell_value(value, environ=None):
+    """
+    bash inserts completions verbatim, values with spaces or globs (cron patterns) are quoted so they stay a single
+    argument, zsh and fish quote completions themselves
+    """
+    if completing_shell(environ) == 'bash':
+        return shlex.quote(value)
+    return value
+
+
+def _complete_jobs(field):
+    def complete(ctx, incomplete):
+        config_file, site_name = selected(ctx)
+        site = read_index(config_file)['sites'].get(site_name, {})
+        refresh(config_file, site_name)
+        return [shell_value(v) for v in site.get(field, []) if v.startswith(incomplete)]
+    return complete
+
+
+complete_patterns = _complete_jobs('patterns')
+complete_commands = _complete_jobs('commands')
+
+
+def complete_with(source):
+    """
+    :return: option arguments hooking up a completion source for the installed click version
+    """
+    import click
+    if hasattr(click.Parameter, 'shell_complete'):
+        return {'shell_complete': lambda ctx, param, incomplete: source(ctx, incomplete)}
+    return {'autocompletion': lambda ctx, args, incomplete: source(ctx, incomplete)}
+
+
+def split_words(text):
+    """
+    split the words of the command line like click does, an unterminated quote ends the last word
+    """
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ''
+    words = []
+    try:
+        for word in lexer:
+            words.append(word)
+    except ValueError:
+        words.append(lexer.token)
+    return words
+
+
+def fast_values(words, incomplete):
+    """
+    :param words: words before the one being completed, without the program name
+    :return: completions of site names, servers, patterns and commands or None when click has to answer
+    """
+    config_file, site_name, command, pending = DEFAULT_CONFIG, 'default', None, None
+    position = 0
+    while position < len(words) and command is None:
+        word = words[position]
+        if word in ROOT_OPTIONS:
+            if position + 1 == len(words):
+                pending = word
+            elif word in ('-c', '--config-file'):
+                config_file = words[position + 1]
+            elif word in ('-s', '--site-name'):
+                site_name = words[position + 1]
+            position += 2
+        elif word.startswith('-'):
+            position += 1
+        else:
+            command = word
+            position += 1
+    if pending in ('-s', '--site-name'):
+        return [n for n in sorted(read_index(config_file)['sites']) if n.startswith(incomplete)]
+    if pending in ('-m', '--selection-mechanism'):
+        site = read_index(config_file)['sites'].get(site_name, {})
+        return [s for s in ['first', 'last', 'random'] + site.get('servers', []) if s.startswith(incomplete)]
+    if command in JOB_COMMANDS and len(words) > position and words[-1] in ('-p', '--pattern', '-c', '--command'):
+        site = read_index(config_file)['sites'].get(site_name, {})
+        refresh(config_file, site_name)
+        field = 'patterns' if words[-1] in ('-p', '--pattern') else 'commands'
+        return [v for v in site.get(field, []) if v.startswith(incomplete)]
+    return None
+
+
+def fast_complete(environ=None, out=None):
+    """
+    answer the completion of option values from the index, before the application (and requests, urllib3, ...) is
+    loaded; only click 8 completion requests are answered, everything else is left to click
+    :return: True when the completion was answered
+    """
+    environ = environ or os.environ
+    shell = completing_shell(environ)
+    if shell not in ('bash', 'zsh', 'fish') or 'COMP_WORDS' not in environ:
+        return False
+    if not any(v in ('bash_complete', 'zsh_complete', 'fish_complete') for k, v in environ.items() if k.endswith('_COMPLETE')):
+        return False
+    try:
+        words = split_words(environ['COMP_WORDS'])
+        if shell == 'fish':
+            incomplete = environ.get('COMP_CWORD', '')
+            words = words[1:-1] if incomplete else words[1:]
+            incomplete = split_words(incomplete)[0] if incomplete else ''
+        else:
+            cword = int(environ['COMP_CWORD'])
+            incomplete = words[cword] if cword < len(words) else ''
+            words = words[1:cword]
+        values = fast_values(words, incomplete)
+    except (ValueError, IndexError, OSError):
+        return False
+    if values is None:
+        return False
+    out = out or sys.stdout
+    for value in values:
+        if shell == 'zsh':
+            out.write("plain\n{0}\n_\n".format(value))
+        else:
+            out.write("plain,{0}\n".format(shell_value(value, environ)))
+    return True
+
+
+def main():
+    """
+    console entry point, completions of option values are answered without loading the application
+    """
+    if fast_complete():
+        return
+    from cli.application import main as application
+    application()
+
+
+def refresh_jobs(config_file, site_name):
+    from cli.client import Client
+    site = next(iter([s for s in Configuration(config_file, create=False).sites if s.name == site_name]), None)
+    if not site or len(site.servers) == 0:
+        return
+    client = Client(site, sorted(site.servers)[0])
+    r = client.get('/jobs', timeout=30)
+    if r.status_code == 200:
+        update_jobs(config_file, site_name, client.json(r))
+
+
+if __name__ == '__main__':
+    refresh_jobs(sys.argv[1], sys.argv[2])
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+
+from hashlib import sha256
+
+from cli.snapshots import VOLATILE, job_key
+
+
+def job_digests(jobs, ignore=VOLATILE):
+    """
+    reduce a job list to a digest per job
+    :param jobs: jobs as returned by dcron
+    :param ignore: fields that are not taken into account
+    :return: dict of job key to (binary) digest
+    """
+    digests = {}
+    for job in jobs:
+        content = dict((k, v) for k, v in job.items() if k not in ignore)
+        digests[job_key(job)] = sha256(json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')).digest()
+    return digests
+
+
+def site_digest(digests):
+    """
+    :param digests: job digests of a node
+    :return: digest over all sorted job digests of a node
+    """
+    h = sha256()
+    for key in sorted(digests):
+        h.update(json.dumps(key).encode('utf-8'))
+        h.update(digests[key])
+    return h.hexdigest()
+
+
+def compare(nodes):
+    """
+    compare the job digests of all nodes, a job is expected when the majority of the nodes has it
+    and its expected content is the content most nodes agree on.
+    :param nodes: dict of node to job digests
+    :return: dict of node to (missing, extra, divergent) lists of job keys
+    """
+    holders = {}
+    for node, digests in nodes.items():
+        for key, digest in digests.items():
+            holders.setdefault(key, {}).setdefault(digest, []).append(node)
+    quorum = len(nodes) // 2 + 1
+    report = dict((node, ([], [], [])) for node in nodes)
+    for key in sorted(holders):
+        versions = holders[key]
+        having = sum(len(v) for v in versions.values())
+        if having >= quorum:
+            for node in nodes:
+                if key not in nodes[node]:
+                    report[node][0].append(key)
+        else:
+            for version in versions.values():
+                for node in version:
+                    report[node][1].append(key)
+            continue
+        if len(versions) > 1:
+            expected = max(versions, key=lambda d: (len(versions[d]), d))
+            for digest, version in versions.items():
+                if digest != expected:
+                    for node in version:
+                        report[node][2].append(key)
+    return report
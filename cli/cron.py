@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# how far back previous() looks for a fire time (patterns like 0 0 30 2 * never fire)
+LIMIT = 366 * 5
+
+MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+MONTHS = dict((name, number + 1) for number, name in enumerate(['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']))
+DAYS = dict((name, number) for number, name in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']))
+
+# name, minimum, maximum, names
+FIELDS = (
+    ('minute', 0, 59, {}),
+    ('hour', 0, 23, {}),
+    ('day of month', 1, 31, {}),
+    ('month', 1, 12, MONTHS),
+    ('day of week', 0, 7, DAYS),
+)
+
+
+def _value(text, field):
+    name, low, high, names = field
+    value = names.get(text.lower()) if names else None
+    if value is None:
+        if not text.isdigit():
+            raise ValueError("invalid {0} value {1}".format(name, text))
+        value = int(text)
+    if value < low or value > high:
+        raise ValueError("{0} value {1} out of range ({2}-{3})".format(name, value, low, high))
+    return value
+
+
+def parse_field(text, field):
+    """
+    :param text: a single cron field (e.g. */5, 1-10/2, mon-fri, 1,15)
+    :param field: field definition
+    :return: set of values the field matches
+    """
+    name, low, high, _ = field
+    values = set()
+    for part in text.split(','):
+        expression, _, step = part.partition('/')
+        if step:
+            if not step.isdigit() or int(step) == 0:
+                raise ValueError("invalid {0} step {1}".format(name, step))
+            step = int(step)
+        else:
+            step = 1
+        if expression == '*':
+            start, end = low, high
+        elif '-' in expression:
+            first, _, last = expression.partition('-')
+            start, end = _value(first, field), _value(last, field)
+            if start > end:
+                raise ValueError("invalid {0} range {1}".format(name, expression))
+        else:
+            start = _value(expression, field)
+            end = high if part != expression else start
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronPattern(object):
+    """
+    Parsed cron pattern (minute hour day-of-month month day-of-week)
+    """
+
+    def __init__(self, pattern):
+        pattern = MACROS.get(pattern.strip(), pattern)
+        parts = pattern.split()
+        if len(parts) != 5:
+            raise ValueError("pattern {0} should have 5 fields (* * * * *)".format(pattern))
+        self.pattern = ' '.join(parts)
+        self.minutes, self.hours, self.days, self.months, weekdays = [frozenset(parse_field(p, f)) for p, f in zip(parts, FIELDS)]
+        # 0 and 7 are both sunday
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        # when both day fields are restricted a day matches either of them
+        self.any_day = parts[2] != '*' and parts[4] != '*'
+        self._hours = sorted(self.hours)
+        self._minutes = sorted(self.minutes)
+        # previous day the pattern fires on per day, matching days per (month length, weekday of the first)
+        self._previous = {}
+        self._months = {}
+
+    def __str__(self):
+        return self.pattern
+
+    def matches_day(self, day):
+        """
+        :param day: date (or datetime)
+        :return: True when the pattern fires on this day
+        """
+        if day.month not in self.months:
+            return False
+        # python counts weekdays from monday, cron from sunday
+        dom, dow = day.day in self.days, (day.weekday() + 1) % 7 in self.weekdays
+        return (dom or dow) if self.any_day else (dom and dow)
+
+    def previous(self, when):
+        """
+        :param when: naive datetime
+        :return: most recent fire time at or before when, None when the pattern never fires within LIMIT days
+        """
+        t = when.replace(second=0, microsecond=0)
+        if self.matches_day(t):
+            position = bisect_right(self._hours, t.hour)
+            if position and self._hours[position - 1] == t.hour:
+                minute = bisect_right(self._minutes, t.minute)
+                if minute:
+                    return t.replace(minute=self._minutes[minute - 1])
+                position -= 1
+            if position:
+                return t.replace(hour=self._hours[position - 1], minute=self._minutes[-1])
+        day = self.previous_day(t.date())
+        if day is None:
+            return None
+        return datetime(day.year, day.month, day.day, self._hours[-1], self._minutes[-1])
+
+    def previous_day(self, day):
+        """
+        :param day: date
+        :return: most recent day before day the pattern fires on, None when there is none within LIMIT days
+        """
+        if day not in self._previous:
+            found = None
+            for offset in range(1, LIMIT + 1):
+                if self.matches_day(day - timedelta(days=offset)):
+                    found = day - timedelta(days=offset)
+                    break
+            self._previous[day] = found
+        return self._previous[day]
+
+    def matching_days(self, first, last):
+        """
+        :param first: date
+        :param last: date (inclusive)
+        :return: number of days in between the pattern fires on, counted per month
+        """
+        total = 0
+        month = date(first.year, first.month, 1)
+        while month <= last:
+            following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            if month.month in self.months:
+                counts = self._month((following - month).days, (month.weekday() + 1) % 7)
+                low = first.day - 1 if first > month else 0
+                high = last.day if last < following else len(counts) - 1
+                total += counts[high] - counts[low]
+            month = following
+        return total
+
+    def _month(self, length, weekday):
+        """
+        :param length: days in the month
+        :param weekday: cron weekday of the first day of the month
+        :return: number of days the pattern fires on up to every day of such a month (index 0 is before the 1st)
+        """
+        key = (length, weekday)
+        if key not in self._months:
+            counts = [0]
+            for day in range(1, length + 1):
+                dom, dow = day in self.days, (weekday + day - 1) % 7 in self.weekdays
+                counts.append(counts[-1] + ((dom or dow) if self.any_day else (dom and dow)))
+            self._months[key] = counts
+        return self._months[key]
+
+    def fires(self, start, end):
+        """
+        :param start: naive datetime (exclusive)
+        :param end: naive datetime (inclusive)
+        :return: number of fire times in between
+        """
+        first, last = start.date(), end.date()
+        if first > last:
+            return 0
+        if first == last:
+            return self._fires_on(first, start, end) if self.matches_day(first) else 0
+        total = self.matching_days(first + timedelta(days=1), last - timedelta(days=1)) * len(self._hours) * len(self._minutes)
+        if self.matches_day(first):
+            total += self._fires_on(first, start, None)
+        if self.matches_day(last):
+            total += self._fires_on(last, None, end)
+        return total
+
+    def _fires_on(self, day, after, until):
+        total = 0
+        for hour in self._hours:
+            if (after and hour < after.hour) or (until and hour > until.hour):
+                continue
+            low = bisect_right(self._minutes, after.minute) if after and hour == after.hour else 0
+            high = bisect_right(self._minutes, until.minute) if until and hour == until.hour else len(self._minutes)
+            total += max(high - low, 0)
+        return total
+
+
+@lru_cache(maxsize=4096)
+def pattern(text):
+    """
+    :return: parsed (and memoized) cron pattern
+    """
+    return CronPattern(text)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import random
+
+from pathlib import Path
+from os.path import exists, dirname
+from time import time
+
+STRATEGIES = ('none', 'round-robin', 'load')
+# idempotent endpoints that any server can answer
+READS = ('/status', '/jobs', '/export')
+# reported loads older than this are not used for weighting
+LOAD_TTL = 300
+
+
+class ReadDistributor(object):
+    """
+    Spreads read-only requests over the servers of a site, either round-robin or weighted by the load the servers
+    report in /status. The state is persisted so consecutive invocations continue where the previous one stopped.
+    """
+
+    def __init__(self, servers, strategy, path):
+        """
+        :param servers: servers of the site
+        :param strategy: round-robin or load
+        :param path: file holding the round-robin position and the last reported loads
+        """
+        self.servers = sorted(servers)
+        self.strategy = strategy
+        self.path = path
+        self.state = None
+        self.random = random.Random()
+
+    def load(self):
+        if self.state is None:
+            self.state = {'next': self.random.randrange(len(self.servers)), 'loads': {}, 'updated': 0}
+            if exists(self.path):
+                try:
+                    with open(self.path, 'r') as fp:
+                        self.state.update(json.load(fp))
+                except ValueError:
+                    pass
+        return self.state
+
+    def save(self):
+        if not exists(dirname(self.path)):
+            Path.mkdir(Path(dirname(self.path)), parents=True)
+        tmp = "{0}.{1}.tmp".format(self.path, os.getpid())
+        with open(tmp, 'w') as fp:
+            json.dump(self.state, fp)
+        os.replace(tmp, self.path)
+
+    def weights(self):
+        """
+        :return: weight per server (1 / (1 + load)) or None when there are no recent loads
+        """
+        state = self.load()
+        loads = dict((s, l) for s, l in state['loads'].items() if s in self.servers)
+        if not loads or time() - state['updated'] > LOAD_TTL:
+            return None
+        weights = dict((s, 1.0 / (1.0 + max(0.0, float(l)))) for s, l in loads.items())
+        # servers that did not report get the average weight
+        average = sum(weights.values()) / len(weights)
+        return [weights.get(s, average) for s in self.servers]
+
+    def pick(self, endpoint):
+        """
+        :param endpoint: endpoint of a GET request
+        :return: server to send the request to, None when the request should go to the entry server
+        """
+        if endpoint not in READS or len(self.servers) < 2:
+            return None
+        if self.strategy == 'load':
+            weights = self.weights()
+            if weights:
+                threshold = self.random.uniform(0, sum(weights))
+                for server, weight in zip(self.servers, weights):
+                    threshold -= weight
+                    if threshold <= 0:
+                        return server
+                return self.servers[-1]
+        state = self.load()
+        server = self.servers[state['next'] % len(self.servers)]
+        state['next'] = (state['next'] + 1) % len(self.servers)
+        self.save()
+        return server
+
+    def observe(self, endpoint, r):
+        """
+        remember the loads reported by a successful /status response
+        """
+        if self.strategy != 'load' or endpoint != '/status' or r.status_code != 200:
+            return
+        try:
+            nodes = r.json()
+            loads = dict((n['ip'], float(n['load'])) for n in nodes if 'ip' in n and 'load' in n)
+        except (ValueError, TypeError, KeyError):
+            return
+        if loads:
+            state = self.load()
+            state['loads'] = loads
+            state['updated'] = time()
+            self.save()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import heapq
+
+from datetime import datetime, timedelta
+
+from dateutil import parser, tz
+
+from cli.cron import pattern
+from cli.stats import summary
+
+
+def parse_time(value, zone):
+    """
+    :param value: iso formatted time, naive times are taken to be in zone already
+    :param zone: timezone the cron patterns are evaluated in
+    :return: naive datetime in zone
+    """
+    if len(value) in (19, 26) and value[10] == 'T':
+        # fast path for the naive timestamps dcron reports, strptime would dominate a pass over all jobs
+        return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]), int(value[11:13]), int(value[14:16]), int(value[17:19]))
+    when = parser.parse(value)
+    if when.tzinfo:
+        when = when.astimezone(zone).replace(tzinfo=None)
+    return when.replace(microsecond=0)
+
+
+class Drift(object):
+    """
+    Compares the last run of every job with the fire times of its pattern in a single pass over the jobs, patterns
+    are parsed and their latest fire time computed once per distinct pattern
+    """
+
+    def __init__(self, now=None, grace=60.0, zone='UTC', top=10):
+        """
+        :param now: naive datetime in zone (default: current time)
+        :param grace: seconds a fire time may be in the past before a run counts as missed
+        :param zone: timezone cron patterns are evaluated in
+        :param top: number of most delayed jobs to keep
+        """
+        self.zone = tz.gettz(zone)
+        if self.zone is None:
+            raise ValueError("unknown timezone {0}".format(zone))
+        self.now = now or datetime.now(self.zone).replace(tzinfo=None)
+        self.deadline = self.now - timedelta(seconds=grace)
+        self.top = top
+        self.expected = {}
+        # node: {'jobs', 'never', 'behind', 'missed', 'lateness'}
+        self.nodes = {}
+        self.worst = []
+        self.skipped = 0
+        self.invalid = 0
+
+    def latest(self, parsed):
+        """
+        :return: most recent fire time of a pattern
+        """
+        if parsed.pattern not in self.expected:
+            self.expected[parsed.pattern] = parsed.previous(self.deadline)
+        return self.expected[parsed.pattern]
+
+    def add(self, job):
+        if not job.get('enabled') or not job.get('parts'):
+            self.skipped += 1
+            return
+        try:
+            parsed = pattern(job['parts'])
+        except ValueError:
+            self.invalid += 1
+            return
+        node = self.nodes.setdefault(job.get('assigned_to'), {'jobs': 0, 'never': 0, 'behind': 0, 'missed': 0, 'lateness': []})
+        node['jobs'] += 1
+        if not job.get('last_run'):
+            node['never'] += 1
+            return
+        try:
+            last = parse_time(job['last_run'], self.zone)
+        except (ValueError, OverflowError):
+            self.invalid += 1
+            return
+        # the fire time the last run belongs to, manual runs count as late runs of the previous fire time
+        fired = parsed.previous(last)
+        lateness = (last - fired).total_seconds() if fired else 0.0
+        node['lateness'].append(lateness)
+        latest = self.latest(parsed)
+        missed = parsed.fires(last, self.deadline) if latest and latest > last else 0
+        if missed:
+            node['behind'] += 1
+            node['missed'] += missed
+        entry = (missed, lateness, job.get('parts'), job.get('command'), job.get('assigned_to'), job.get('last_run'), latest)
+        if len(self.worst) < self.top:
+            heapq.heappush(self.worst, entry)
+        elif self.top:
+            heapq.heappushpop(self.worst, entry)
+
+    def report(self):
+        """
+        :return: list of (node, jobs, never run, jobs behind, missed runs, lateness summary) per node
+        """
+        return [(node, n['jobs'], n['never'], n['behind'], n['missed'], summary(n['lateness']))
+                for node, n in sorted(self.nodes.items(), key=lambda i: str(i[0]))]
+
+    def most_delayed(self):
+        """
+        :return: (missed runs, lateness, pattern, command, node, last run, expected fire time) of the most delayed jobs
+        """
+        return sorted(self.worst, reverse=True)
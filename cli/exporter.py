@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from time import perf_counter, sleep, time
+
+import requests
+
+from cli.history import samples
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# request latency buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(k, escape(v)) for k, v in pairs) + '}'
+
+
+class Histogram(object):
+    """
+    Cumulative histogram of observed values
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Metrics(object):
+    """
+    Metric families of the exporter, gauges are replaced (or removed) on every poll, histograms accumulate
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.help = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def gauge(self, name, help_text, values):
+        """
+        :param values: list of (label pairs, value)
+        """
+        with self.lock:
+            self.help[name] = help_text
+            self.gauges[name] = values
+
+    def remove(self, *names):
+        """
+        drop gauges that could not be refreshed, rather than serving stale values
+        """
+        with self.lock:
+            for name in names:
+                self.gauges.pop(name, None)
+
+    def observe(self, name, help_text, pairs, value):
+        with self.lock:
+            self.help[name] = help_text
+            family = self.histograms.setdefault(name, {})
+            if pairs not in family:
+                family[pairs] = Histogram()
+            family[pairs].observe(value)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name in sorted(self.gauges):
+                lines.append("# TYPE {0} gauge".format(name))
+                lines.append("# HELP {0} {1}".format(name, self.help[name]))
+                for pairs, value in self.gauges[name]:
+                    lines.append("{0}{1} {2}".format(name, labels(pairs), value))
+            for name in sorted(self.histograms):
+                lines.append("# TYPE {0} histogram".format(name))
+                lines.append("# HELP {0} {1}".format(name, self.help[name]))
+                for pairs, histogram in sorted(self.histograms[name].items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append("{0}_bucket{1} {2}".format(name, labels(pairs + (('le', bound),)), count))
+                    lines.append("{0}_bucket{1} {2}".format(name, labels(pairs + (('le', '+Inf'),)), histogram.count))
+                    lines.append("{0}_count{1} {2}".format(name, labels(pairs), histogram.count))
+                    lines.append("{0}_sum{1} {2}".format(name, labels(pairs), histogram.sum))
+        lines.append('# EOF')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Exporter(object):
+    """
+    Polls a site on a fixed interval and keeps the rendered metrics in memory, scrapes never hit the cluster
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, client, interval=15, textfile=None, history=None):
+        self.client = client
+        self.interval = interval
+        self.textfile = textfile
+        self.history = history
+        self.metrics = Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(client.site.servers)))
+        self.content = self.metrics.render()
+
+    def timed(self, endpoint, server=None):
+        start = perf_counter()
+        r = self.client.get(endpoint, server=server)
+        self.metrics.observe('dcron_request_duration_seconds', 'duration of requests to dcron',
+                             (('endpoint', endpoint), ('server', server or self.client.entry)), perf_counter() - start)
+        return r
+
+    def sync(self, server):
+        try:
+            return server, 1 if self.timed('/cron_in_sync', server).status_code == 200 else 0
+        except requests.exceptions.RequestException as e:
+            self.logger.warning("could not reach {0}: {1}".format(server, e))
+            return server, None
+
+    def retrieve(self, endpoint):
+        """
+        :return: decoded response, None when it could not be retrieved
+        """
+        try:
+            r = self.timed(endpoint)
+            if r.status_code != 200:
+                self.logger.warning("could not retrieve {0}: {1} ({2})".format(endpoint, r.text, r.status_code))
+                return None
+            return self.client.json(r)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.logger.warning("could not retrieve {0}: {1}".format(endpoint, e))
+            return None
+
+    def poll(self):
+        """
+        refresh all metrics and the rendered content
+        """
+        start = time()
+        nodes, jobs = self.retrieve('/status'), self.retrieve('/jobs')
+        if nodes is not None:
+            try:
+                load = [((('node', n['ip']),), float(n['load'])) for n in nodes]
+                states = [((('node', n['ip']), ('state', n['state'])), 1) for n in nodes]
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.warning("unexpected /status response: {0}".format(e))
+                nodes = None
+        if nodes is None:
+            self.metrics.remove('dcron_node_load', 'dcron_node_state')
+        else:
+            self.metrics.gauge('dcron_node_load', 'load reported by the node in percent', load)
+            self.metrics.gauge('dcron_node_state', 'state reported by the node', states)
+        if jobs is not None:
+            try:
+                running = dict((server, 0) for server in self.client.site.servers)
+                for job in jobs:
+                    if job.get('pid'):
+                        running[job.get('assigned_to')] = running.get(job.get('assigned_to'), 0) + 1
+            except (AttributeError, TypeError) as e:
+                self.logger.warning("unexpected /jobs response: {0}".format(e))
+                jobs = None
+        if jobs is None:
+            self.metrics.remove('dcron_jobs', 'dcron_jobs_running')
+        else:
+            self.metrics.gauge('dcron_jobs', 'number of jobs on the cluster', [((), len(jobs))])
+            self.metrics.gauge('dcron_jobs_running', 'number of running jobs per node',
+                               [((('node', node),), count) for node, count in sorted(running.items(), key=lambda i: str(i[0]))])
+        in_sync = list(self.executor.map(self.sync, self.client.site.servers))
+        self.metrics.gauge('dcron_cron_in_sync', 'cron of the node is in sync with the cluster',
+                           [((('node', server),), value) for server, value in in_sync if value is not None])
+        self.metrics.gauge('dcron_node_up', 'node answered the last probe',
+                           [((('node', server),), 0 if value is None else 1) for server, value in in_sync])
+        self.metrics.gauge('dcron_up', 'cluster state could be retrieved', [((), 0 if nodes is None or jobs is None else 1)])
+        self.metrics.gauge('dcron_last_poll_timestamp_seconds', 'time of the last poll', [((), start)])
+        if self.history:
+            self.history.append(samples(start, nodes, dict(in_sync), jobs))
+        self.content = self.metrics.render()
+        if self.textfile:
+            tmp = "{0}.tmp".format(self.textfile)
+            try:
+                with open(tmp, 'wb') as fp:
+                    fp.write(self.content)
+                os.replace(tmp, self.textfile)
+            except OSError as e:
+                self.logger.warning("could not write {0}: {1}".format(self.textfile, e))
+
+    def run(self):
+        while True:
+            start = perf_counter()
+            # a single failing poll should not end the exporter, the next one may well succeed
+            try:
+                self.poll()
+            except Exception as e:
+                self.logger.error("poll failed: {0}".format(e), exc_info=True)
+            sleep(max(0.0, self.interval - (perf_counter() - start)))
+
+    def serve(self, address, port):
+        """
+        serve the rendered metrics on a background thread
+        :return: the http server
+        """
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                content = exporter.content
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        server = ThreadingServer((address, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import mmap
+import os
+import re
+import struct
+
+from os.path import dirname, exists
+from time import time
+
+from dateutil import parser
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+MAGIC = b'DCRH'
+VERSION = 1
+# magic, version, record size, capacity, head (next record), count
+HEADER = struct.Struct('<4sIIQQQ')
+HEADER_SIZE = 64
+# time, node, state, load, in sync (-1 unknown), running jobs
+RECORD = struct.Struct('<d48s12sfbxxxI')
+
+
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def _text(value):
+    return value.rstrip(b'\0').decode('utf-8', 'replace')
+
+
+def seconds(value):
+    """
+    :param value: duration like 90s, 15m, 24h, 7d or 2w
+    :return: number of seconds
+    """
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$', value)
+    if not match:
+        raise ValueError("invalid duration {0}".format(value))
+    return float(match.group(1)) * UNITS[match.group(2) or 's']
+
+
+def timestamp(value, now=None):
+    """
+    :param value: duration relative to now (e.g. 24h) or an absolute date/time
+    :return: unix timestamp
+    """
+    try:
+        return (now or time()) - seconds(value)
+    except ValueError:
+        return parser.parse(value).timestamp()
+
+
+def samples(when, nodes, in_sync, jobs=None):
+    """
+    combine the responses of a status poll into samples
+    :param when: unix timestamp of the poll
+    :param nodes: /status response
+    :param in_sync: dict of server to True, False or None (unreachable)
+    :param jobs: /jobs response, None if not retrieved
+    :return: list of (time, node, state, load, in sync, running jobs)
+    """
+    running = {}
+    for job in jobs or []:
+        if job.get('pid'):
+            running[job.get('assigned_to')] = running.get(job.get('assigned_to'), 0) + 1
+    result = []
+    seen = set()
+    for node in nodes or []:
+        if 'ip' in node:
+            seen.add(node['ip'])
+            result.append((when, node['ip'], node.get('state'), node.get('load'), in_sync.get(node['ip']), running.get(node['ip'], 0)))
+    for server in in_sync:
+        if server not in seen:
+            result.append((when, server, None, None, in_sync[server], running.get(server, 0)))
+    return result
+
+
+class History(object):
+    """
+    Fixed size ring buffer of node samples in a memory mapped file, once full the oldest samples are overwritten.
+    Samples are appended in time order, so time ranges are found by binary search.
+    """
+
+    def __init__(self, path, capacity=100000):
+        self.path = path
+        if not exists(path):
+            if not exists(dirname(path)):
+                os.makedirs(dirname(path))
+            with open(path, 'wb') as fp:
+                fp.write(HEADER.pack(MAGIC, VERSION, RECORD.size, capacity, 0, 0).ljust(HEADER_SIZE, b'\0'))
+                fp.truncate(HEADER_SIZE + capacity * RECORD.size)
+        self.fp = open(path, 'r+b')
+        self.map = mmap.mmap(self.fp.fileno(), 0)
+        magic, version, size, self.capacity, _, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or size != RECORD.size:
+            self.close()
+            raise ValueError("{0} is not a history file".format(path))
+
+    def close(self):
+        self.map.close()
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def count(self):
+        return HEADER.unpack_from(self.map, 0)[5]
+
+    def _offset(self, index):
+        """
+        :param index: logical index, 0 is the oldest sample
+        :return: offset of the record in the file
+        """
+        _, _, _, _, head, count = HEADER.unpack_from(self.map, 0)
+        return HEADER_SIZE + ((head - count + index) % self.capacity) * RECORD.size
+
+    def append(self, samples):
+        """
+        :param samples: list of (time, node, state, load, in sync (True, False or None), running jobs)
+        """
+        if fcntl:
+            fcntl.flock(self.fp, fcntl.LOCK_EX)
+        try:
+            magic, version, size, capacity, head, count = HEADER.unpack_from(self.map, 0)
+            for timestamp, node, state, load, in_sync, running in samples:
+                RECORD.pack_into(self.map, HEADER_SIZE + (head % capacity) * RECORD.size, timestamp,
+                                 str(node).encode('utf-8')[:48], str(state or '').encode('utf-8')[:12],
+                                 float(load) if load is not None else float('nan'),
+                                 -1 if in_sync is None else int(bool(in_sync)), int(running or 0))
+                head += 1
+                count = min(count + 1, capacity)
+            HEADER.pack_into(self.map, 0, magic, version, size, capacity, head % capacity, count)
+        finally:
+            if fcntl:
+                fcntl.flock(self.fp, fcntl.LOCK_UN)
+
+    def _time(self, index):
+        return struct.unpack_from('<d', self.map, self._offset(index))[0]
+
+    def _bisect(self, timestamp):
+        """
+        :return: logical index of the first sample at or after timestamp
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._time(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def query(self, since=None, until=None, node=None):
+        """
+        :return: generator of samples (time, node, state, load, in sync, running) within [since, until)
+        """
+        start = self._bisect(since) if since is not None else 0
+        end = self._bisect(until) if until is not None else self.count
+        # the range is at most two contiguous stretches of the file
+        while start < end:
+            first = self._offset(start)
+            length = min(end - start, (len(self.map) - first) // RECORD.size)
+            for timestamp, name, state, load, in_sync, running in RECORD.iter_unpack(self.map[first:first + length * RECORD.size]):
+                name = _text(name)
+                if node is None or name == node:
+                    yield timestamp, name, _text(state), load, None if in_sync < 0 else bool(in_sync), running
+            start += length
+
+    def aggregate(self, since=None, until=None, node=None, bucket=None):
+        """
+        :param bucket: size of the time buckets in seconds (default: one bucket for the whole range)
+        :return: dict of (node, bucket start) to dict with samples, load and running as (min, avg, max), in sync ratio
+                 and last state
+        """
+        result = {}
+        for timestamp, name, state, load, in_sync, running in self.query(since, until, node):
+            key = (name, timestamp - timestamp % bucket if bucket else None)
+            entry = result.get(key)
+            if entry is None:
+                entry = result[key] = {'samples': 0, 'load': [], 'running': [], 'synced': 0, 'probed': 0}
+            entry['samples'] += 1
+            entry['state'] = state
+            # min, sum, max and count of every field, missing loads are stored as nan
+            for field, value in (('load', load), ('running', running)):
+                if value == value:
+                    stats = entry[field]
+                    if not stats:
+                        stats.extend([value, 0.0, value, 0])
+                    stats[0] = min(stats[0], value)
+                    stats[1] += value
+                    stats[2] = max(stats[2], value)
+                    stats[3] += 1
+            if in_sync is not None:
+                entry['probed'] += 1
+                entry['synced'] += int(in_sync)
+        for entry in result.values():
+            for field in ('load', 'running'):
+                stats = entry[field]
+                entry[field] = (stats[0], stats[1] / stats[3], stats[2]) if stats else None
+            entry['in_sync'] = entry.pop('synced') / float(entry['probed']) if entry['probed'] else None
+            del entry['probed']
+        return result
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import mmap
+import os
+import struct
+import zlib
+
+from array import array
+from bisect import bisect_left
+
+from cli.records import iter_records
+
+MAGIC = b'DCRX'
+VERSION = 1
+# magic, version, source size, source modification time (ns), records
+HEADER = struct.Struct('<4sIQQQ')
+HEADER_SIZE = 64
+# offset and length of the record in the export, flags
+RECORD = struct.Struct('<QIB3x')
+ENABLED = 1
+RUNNING = 2
+# every key is a sorted array of (crc32 of the value << 32 | record number)
+KEYS = ('parts', 'command', 'user', 'assigned_to')
+
+
+def _hash(value):
+    return zlib.crc32(str(value).encode('utf-8')) & 0xffffffff
+
+
+def index_path(export):
+    return "{0}.idx".format(export)
+
+
+class ExportIndex(object):
+    """
+    Memory mapped sidecar index of an export file, the export itself is only read for the records that match a
+    query. The index is rebuilt when the export changed. Keys are stored in native byte order, the index is a
+    local cache and not meant to be copied between machines.
+    """
+
+    def __init__(self, export):
+        self.export = export
+        self.path = index_path(export)
+        self.fp = None
+        self.map = None
+        self.count = 0
+
+    @classmethod
+    def open(cls, export):
+        """
+        :param export: export file (as written by the export command)
+        :return: index, built first when missing or outdated
+        """
+        index = cls(export)
+        if not index.load():
+            index.build()
+            index.load()
+        return index
+
+    def _source(self):
+        stat = os.stat(self.export)
+        return stat.st_size, stat.st_mtime_ns
+
+    def load(self):
+        """
+        :return: True when an up to date index was mapped
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'rb') as fp:
+            try:
+                data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return False
+        if len(data) < HEADER_SIZE:
+            data.close()
+            return False
+        magic, version, size, mtime, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION or (size, mtime) != self._source() or \
+                len(data) != HEADER_SIZE + count * (RECORD.size + 8 * len(KEYS)):
+            data.close()
+            return False
+        self.close()
+        self.map = data
+        self.count = count
+        return True
+
+    def build(self):
+        """
+        index the export in a single streaming pass
+        :return: number of indexed records
+        """
+        size, mtime = self._source()
+        records = bytearray()
+        keys = dict((k, array('Q')) for k in KEYS)
+        with open(self.export, 'rb') as source:
+            for offset, length, job in iter_records(source, on_error=lambda *_: None):
+                if not isinstance(job, dict):
+                    continue
+                number = len(records) // RECORD.size
+                flags = (ENABLED if job.get('enabled') else 0) | (RUNNING if job.get('pid') else 0)
+                records += RECORD.pack(offset, length, flags)
+                for key in KEYS:
+                    keys[key].append(_hash(job.get(key, '')) << 32 | number)
+        count = len(records) // RECORD.size
+        tmp = "{0}.{1}.tmp".format(self.path, os.getpid())
+        with open(tmp, 'wb') as fp:
+            fp.write(HEADER.pack(MAGIC, VERSION, size, mtime, count).ljust(HEADER_SIZE, b'\0'))
+            fp.write(records)
+            for key in KEYS:
+                fp.write(array('Q', sorted(keys[key])).tobytes())
+        os.replace(tmp, self.path)
+        return count
+
+    def close(self):
+        if self.map:
+            self.map.close()
+            self.map = None
+        if self.fp:
+            self.fp.close()
+            self.fp = None
+
+    def _keys(self, key):
+        start = HEADER_SIZE + self.count * RECORD.size + KEYS.index(key) * self.count * 8
+        return memoryview(self.map)[start:start + self.count * 8].cast('Q')
+
+    def numbers(self, key, value):
+        """
+        :return: record numbers whose key hashes like value (may contain collisions)
+        """
+        keys = self._keys(key)
+        h = _hash(value) << 32
+        position = bisect_left(keys, h)
+        numbers = []
+        while position < self.count and keys[position] >> 32 == h >> 32:
+            numbers.append(keys[position] & 0xffffffff)
+            position += 1
+        keys.release()
+        return numbers
+
+    def record(self, number):
+        """
+        :return: job stored in the export as record number
+        """
+        offset, length, _ = RECORD.unpack_from(self.map, HEADER_SIZE + number * RECORD.size)
+        if not self.fp:
+            self.fp = open(self.export, 'rb')
+        self.fp.seek(offset)
+        return json.loads(self.fp.read(length).decode('utf-8'))
+
+    def find(self, running=None, enabled=None, **criteria):
+        """
+        :param running: only jobs with (True) or without (False) a running pid
+        :param enabled: only enabled (True) or disabled (False) jobs
+        :param criteria: exact values for parts, command, user and/or assigned_to
+        :return: matching jobs in export order
+        """
+        criteria = dict((k, v) for k, v in criteria.items() if v is not None)
+        numbers = None
+        for key, value in criteria.items():
+            found = set(self.numbers(key, value))
+            numbers = found if numbers is None else numbers & found
+        numbers = range(self.count) if numbers is None else sorted(numbers)
+        jobs = []
+        for number in numbers:
+            if running is not None or enabled is not None:
+                _, _, flags = RECORD.unpack_from(self.map, HEADER_SIZE + number * RECORD.size)
+                if running is not None and bool(flags & RUNNING) != running:
+                    continue
+                if enabled is not None and bool(flags & ENABLED) != enabled:
+                    continue
+            job = self.record(number)
+            if all(job.get(k) == v for k, v in criteria.items()):
+                jobs.append(job)
+        return jobs
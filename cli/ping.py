@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import requests
+
+from cli.stats import summary
+
+
+def jitter(latencies):
+    """
+    :param latencies: latencies in the order the requests were sent
+    :return: mean absolute difference between consecutive latencies
+    """
+    if len(latencies) < 2:
+        return 0.0
+    return sum(abs(b - a) for a, b in zip(latencies, latencies[1:])) / (len(latencies) - 1)
+
+
+class Pinger(object):
+    """
+    Sends a number of lightweight requests to every server and splits their latency in connect, tls and server time
+    """
+
+    def __init__(self, client, servers, count=10, concurrency=4, interval=0.0, endpoint='/cron_in_sync', timeout=5.0, fresh=False):
+        """
+        :param client: client with timings enabled
+        :param count: requests per server
+        :param concurrency: servers pinged concurrently
+        :param interval: seconds between consecutive requests to the same server
+        :param fresh: open a new connection for every request, so every request includes connect (and tls) time
+        """
+        self.client = client
+        self.servers = list(servers)
+        self.count = count
+        self.concurrency = concurrency
+        self.interval = interval
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.fresh = fresh
+        # server: [(sequence, timing record or None, error)]
+        self.results = dict((s, []) for s in self.servers)
+
+    def ping(self, server):
+        """
+        send the requests to a single server one after the other, waiting interval seconds in between
+        """
+        kwargs = {'timeout': self.timeout}
+        if self.fresh:
+            kwargs['headers'] = {'Connection': 'close'}
+        for sequence in range(self.count):
+            if self.interval and sequence:
+                sleep(self.interval)
+            try:
+                r = self.client.get(self.endpoint, server=server, **kwargs)
+                self.results[server].append((sequence, r.timing, None))
+            except requests.exceptions.RequestException as e:
+                self.results[server].append((sequence, None, e))
+
+    def run(self):
+        # servers are pinged concurrently, requests to the same server never overlap
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(self.servers)))) as executor:
+            for future in [executor.submit(self.ping, server) for server in self.servers]:
+                future.result()
+
+    def report(self):
+        """
+        :return: list of (server, sent, failed, non 2xx, latency summary, jitter, mean connect, mean tls, mean server time)
+        """
+        rows = []
+        for server in self.servers:
+            results = sorted(self.results[server], key=lambda r: r[0])
+            records = [record for _, record, _ in results if record]
+            latencies = [r['connect'] + r['tls'] + r['ttfb'] + r['transfer'] for r in records]
+            failed = len(results) - len(records)
+            status = sum(1 for r in records if not 200 <= r['status'] < 300)
+
+            def mean(field):
+                return sum(r[field] for r in records) / len(records) if records else 0.0
+
+            rows.append((server, len(results), failed, status, summary(latencies), jitter(latencies),
+                         mean('connect'), mean('tls'), mean('ttfb')))
+        return rows
+
+    def errors(self):
+        """
+        :return: last error per server that had failures
+        """
+        return dict((s, e) for s in self.servers for _, _, e in self.results[s] if e is not None)
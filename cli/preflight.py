@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import hashlib
+import json
+
+from cli.cron import CronPattern
+from cli.records import iter_records
+
+FIELDS = ('minute', 'hour', 'dom', 'month', 'dow')
+MAX_REASONS = 20
+
+
+def job_pattern(job):
+    """
+    :param job: job record, either with a full pattern or with the separate cron fields
+    :return: the cron pattern of the job or None
+    """
+    pattern = job.get('parts', job.get('pattern'))
+    if pattern is None and all(f in job for f in FIELDS):
+        pattern = ' '.join(str(job[f]) for f in FIELDS)
+    return pattern
+
+
+def digest(pattern, command):
+    """
+    :return: fixed size hash of a normalized (pattern, command) pair
+    """
+    return hashlib.sha1("{0}\0{1}".format(pattern, command.strip()).encode('utf-8')).digest()
+
+
+def validate(job):
+    """
+    :param job: decoded job record
+    :return: (normalized pattern, command)
+    :raises ValueError: when the record is not a valid job
+    """
+    if not isinstance(job, dict):
+        raise ValueError('record is not an object')
+    command = job.get('command')
+    if not command or not str(command).strip():
+        raise ValueError('missing command')
+    pattern = job_pattern(job)
+    if not pattern:
+        raise ValueError('missing pattern')
+    return CronPattern(str(pattern)).pattern, str(command)
+
+
+def existing_digests(jobs):
+    """
+    :param jobs: jobs as returned by dcron
+    :return: set of digests of the jobs already known to the cluster
+    """
+    digests = set()
+    for job in jobs:
+        pattern = job_pattern(job) or ''
+        try:
+            pattern = CronPattern(pattern).pattern
+        except ValueError:
+            pass
+        digests.add(digest(pattern, job.get('command') or ''))
+    return digests
+
+
+class Report(object):
+    """
+    Outcome of a pre-flight pass
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.existing = 0
+        self.kept = 0
+        self.reasons = []
+
+    def reject(self, offset, reason):
+        self.invalid += 1
+        if len(self.reasons) < MAX_REASONS:
+            self.reasons.append((offset, reason))
+
+    def log(self, logger):
+        logger.info("records: {0}, kept: {1}, invalid: {2}, duplicates: {3}, existing: {4}".format(
+            self.total, self.kept, self.invalid, self.duplicates, self.existing))
+        for offset, reason in self.reasons:
+            logger.warning("invalid record at byte {0}: {1}".format(offset, reason))
+        if self.invalid > len(self.reasons):
+            logger.warning("... {0} more invalid records".format(self.invalid - len(self.reasons)))
+
+
+def preflight(source, target, existing=None):
+    """
+    validate, deduplicate and filter an import file in a single streaming pass,
+    only the hashes of the jobs seen are kept in memory
+    :param source: import file opened in binary mode
+    :param target: binary file receiving the kept records as a json array (or None for a dry run)
+    :param existing: digests of the jobs already on the cluster, these are skipped
+    :return: Report
+    """
+    report = Report()
+    seen = set()
+
+    def rejected(offset, reason):
+        report.total += 1
+        report.reject(offset, reason)
+
+    if target:
+        target.write(b'[')
+    for offset, _, job in iter_records(source, on_error=rejected):
+        report.total += 1
+        try:
+            pattern, command = validate(job)
+        except ValueError as e:
+            report.reject(offset, e)
+            continue
+        key = digest(pattern, command)
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        if existing and key in existing:
+            report.existing += 1
+            continue
+        if target:
+            if report.kept:
+                target.write(b',')
+            target.write(json.dumps(job).encode('utf-8'))
+        report.kept += 1
+    if target:
+        target.write(b']')
+    return report
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import codecs
+import json
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = ' \t\r\n'
+# a decode error this close to the end of the buffer may be a literal (e.g. -Infinity) cut off by the chunk boundary
+TAIL = 16
+
+
+def _truncated(error, buffer):
+    """
+    :return: True when a decode error can be caused by the record continuing in the next chunk
+    """
+    if str(error).startswith('Unterminated string'):
+        return True
+    return len(buffer) - getattr(error, 'pos', len(buffer)) <= TAIL
+
+
+class RecordError(ValueError):
+
+    def __init__(self, offset, message):
+        super(RecordError, self).__init__("invalid record at byte {0}: {1}".format(offset, message))
+        self.offset = offset
+
+
+def _array(fp, first, chunk_size, decoder):
+    """
+    stream the elements of a json array, only a single chunk and the current record are kept in memory (also for
+    a malformed record, the error is raised without reading on)
+    """
+    incremental = codecs.getincrementaldecoder('utf-8')()
+    buffer = first
+    offset = 0
+    eof = False
+    pos = 1
+    offset += 1
+    while True:
+        # skip whitespace and separators
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE + ',':
+                pos += 1
+                offset += 1
+            if pos < len(buffer) or eof:
+                break
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + incremental.decode(chunk, final=eof)
+            pos = 0
+        if pos >= len(buffer):
+            raise RecordError(offset, 'unexpected end of file')
+        if buffer[pos] == ']':
+            return
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                # a number at the end of the buffer might continue in the next chunk
+                if end < len(buffer) or eof:
+                    break
+            except ValueError as e:
+                # only a record cut off by the end of the buffer is worth reading more for
+                if eof or not _truncated(e, buffer):
+                    raise RecordError(offset, str(e))
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + incremental.decode(chunk, final=eof)
+            pos = 0
+        length = len(buffer[pos:end].encode('utf-8'))
+        yield offset, length, record
+        offset += length
+        pos = end
+
+
+def _lines(fp, first, decoder, on_error):
+    offset = 0
+    for line in fp:
+        if first:
+            line, first = first + line, None
+        text = line.decode('utf-8', 'replace').strip()
+        if text:
+            try:
+                yield offset, len(line), decoder.decode(text)
+            except ValueError as e:
+                if on_error is None:
+                    raise RecordError(offset, str(e))
+                on_error(offset, str(e))
+        offset += len(line)
+
+
+def iter_records(fp, chunk_size=CHUNK_SIZE, on_error=None):
+    """
+    stream job records from an export file, either a json array or one json record per line
+    :param fp: file opened in binary mode
+    :param on_error: called with (offset, message) for lines that can not be decoded (one record per line only),
+                     by default a RecordError is raised
+    :return: generator of (byte offset, byte length, record)
+    """
+    decoder = json.JSONDecoder()
+    head = b''
+    while True:
+        byte = fp.read(1)
+        if not byte:
+            return
+        if byte.decode('latin-1') not in WHITESPACE:
+            break
+        head += byte
+    if byte == b'[':
+        for offset, length, record in _array(fp, '[', chunk_size, decoder):
+            yield offset + len(head), length, record
+    else:
+        for offset, length, record in _lines(fp, head + byte, decoder, on_error):
+            yield offset, length, record
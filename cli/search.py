@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import re
+
+from itertools import islice
+from multiprocessing import Pool, cpu_count, get_all_start_methods, get_context
+
+# below this number of jobs scanning is not worth starting worker processes
+PARALLEL_THRESHOLD = 5000
+CHUNK_SIZE = 1000
+
+_regex = None
+_jobs = None
+
+
+def _init(pattern, flags, jobs=None):
+    global _regex, _jobs
+    _regex = re.compile(pattern, flags)
+    _jobs = jobs
+
+
+def lines(job):
+    for entry in job.get('log') or []:
+        for line in str(entry).splitlines():
+            yield line
+
+
+def scan(jobs, regex, context=0):
+    """
+    :param jobs: jobs to search the logs of
+    :param regex: compiled pattern
+    :param context: number of lines to include before and after a match
+    :return: generator of matches (pattern, command, node, line number, before, line, after)
+    """
+    for job in jobs:
+        log = None
+        for number, line in enumerate(lines(job)):
+            if regex.search(line):
+                if context and log is None:
+                    log = list(lines(job))
+                before = log[max(0, number - context):number] if context else []
+                after = log[number + 1:number + 1 + context] if context else []
+                yield job.get('parts'), job.get('command'), job.get('assigned_to'), number + 1, before, line, after
+
+
+def _scan_chunk(args):
+    chunk, context, max_count = args
+    if isinstance(chunk, tuple):
+        # forked workers share the job list with their parent, only the range is sent
+        chunk = _jobs[chunk[0]:chunk[1]]
+    return list(islice(scan(chunk, _regex, context), max_count or None))
+
+
+def search(jobs, pattern, flags=0, context=0, max_count=None, processes=None):
+    """
+    search the logs of all jobs, large job lists are scanned by a pool of worker processes, results keep job order
+    :param jobs: jobs to search
+    :param pattern: regular expression
+    :param max_count: stop after this many matches
+    :param processes: number of worker processes (default: number of cpus)
+    :return: generator of matches
+    """
+    processes = processes or cpu_count()
+    count = 0
+    if processes < 2 or len(jobs) < PARALLEL_THRESHOLD:
+        for match in scan(jobs, re.compile(pattern, flags), context):
+            yield match
+            count += 1
+            if max_count and count >= max_count:
+                return
+        return
+    if 'fork' in get_all_start_methods():
+        chunks = (((i, i + CHUNK_SIZE), context, max_count) for i in range(0, len(jobs), CHUNK_SIZE))
+        pool = get_context('fork').Pool(processes, initializer=_init, initargs=(pattern, flags, jobs))
+    else:
+        # only ship what the workers need
+        slim = [dict((k, job.get(k)) for k in ('parts', 'command', 'assigned_to', 'log')) for job in jobs]
+        chunks = ((slim[i:i + CHUNK_SIZE], context, max_count) for i in range(0, len(slim), CHUNK_SIZE))
+        pool = Pool(processes, initializer=_init, initargs=(pattern, flags))
+    try:
+        for matches in pool.imap(_scan_chunk, chunks):
+            for match in matches:
+                yield match
+                count += 1
+                if max_count and count >= max_count:
+                    return
+    finally:
+        pool.terminate()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import logging
+import os
+import re
+
+from datetime import datetime
+from hashlib import sha256
+from os.path import exists, join
+
+
+# runtime state that is updated independently on every node, not part of the job definition
+VOLATILE = ('pid', 'last_run', 'log')
+# snapshot names end up in file names, no path separators or leading dots
+NAME = re.compile(r'[\w-][\w.-]*')
+
+
+def job_key(job):
+    """
+    identify a job by its cron pattern and command
+    :param job: job as returned by dcron
+    :return: (pattern, command) tuple
+    """
+    return job.get('parts', job.get('pattern')) or '', job.get('command') or ''
+
+
+class SnapshotStore(object):
+    """
+    Content addressed store for exported jobs, every job is stored once by the hash of its definition
+    and every snapshot is a manifest listing the hashes of the jobs it contains. Runtime state (VOLATILE) is
+    not stored, so jobs that merely ran do not take up new space or show up as changed.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, root):
+        self.root = root
+        self.objects = join(root, 'objects')
+        self.manifests = join(root, 'manifests')
+
+    @staticmethod
+    def definition(job):
+        """
+        :return: the job without its runtime state
+        """
+        return dict((k, v) for k, v in job.items() if k not in VOLATILE)
+
+    @classmethod
+    def encode(cls, job):
+        return json.dumps(cls.definition(job), sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def object_path(self, digest):
+        return join(self.objects, digest[:2], digest[2:])
+
+    def manifest_path(self, name):
+        if not NAME.fullmatch(name):
+            raise ValueError("invalid snapshot name {0} (letters, digits, '_', '-' and '.', not starting with '.')".format(name))
+        return join(self.manifests, "{0}.json".format(name))
+
+    @staticmethod
+    def _write(path, content):
+        directory = os.path.dirname(path)
+        if not exists(directory):
+            os.makedirs(directory)
+        tmp = "{0}.tmp".format(path)
+        with open(tmp, 'wb') as fp:
+            fp.write(content)
+        os.replace(tmp, path)
+
+    def put(self, job):
+        """
+        store a job if we have not seen its content before
+        :param job: job to store
+        :return: (digest, stored) where stored indicates if a new object was written
+        """
+        content = self.encode(job)
+        digest = sha256(content).hexdigest()
+        path = self.object_path(digest)
+        if exists(path):
+            return digest, False
+        self._write(path, content)
+        return digest, True
+
+    def get(self, digest):
+        with open(self.object_path(digest), 'rb') as fp:
+            return json.loads(fp.read().decode('utf-8'))
+
+    def create(self, jobs, name=None):
+        """
+        create a snapshot of the given jobs
+        :param jobs: list of jobs (as exported by dcron)
+        :param name: name of the snapshot (default: current utc time)
+        :return: manifest of the snapshot and the number of newly stored objects
+        """
+        created = datetime.utcnow()
+        if not name:
+            name = created.strftime('%Y%m%dT%H%M%S')
+        if exists(self.manifest_path(name)):
+            raise ValueError("snapshot {0} already exists".format(name))
+        digests = []
+        stored = 0
+        for job in jobs:
+            digest, new = self.put(job)
+            digests.append(digest)
+            if new:
+                stored += 1
+        manifest = {
+            'name': name,
+            'created': created.isoformat(),
+            'jobs': digests,
+        }
+        self._write(self.manifest_path(name), json.dumps(manifest).encode('utf-8'))
+        self.logger.debug("created snapshot {0} with {1} jobs ({2} new objects)".format(name, len(digests), stored))
+        return manifest, stored
+
+    def list(self):
+        """
+        :return: all manifests, oldest first
+        """
+        if not exists(self.manifests):
+            return []
+        manifests = []
+        for file_name in os.listdir(self.manifests):
+            if file_name.endswith('.json') and NAME.fullmatch(file_name[:-len('.json')]):
+                manifests.append(self.load(file_name[:-len('.json')]))
+        return sorted(manifests, key=lambda m: (m['created'], m['name']))
+
+    def load(self, name):
+        try:
+            path = self.manifest_path(name)
+        except ValueError as e:
+            raise KeyError(str(e))
+        if not exists(path):
+            raise KeyError("snapshot {0} not found".format(name))
+        with open(path, 'r') as fp:
+            return json.load(fp)
+
+    def jobs(self, name):
+        """
+        :param name: name of the snapshot
+        :return: the jobs stored in the snapshot
+        """
+        return [self.get(digest) for digest in self.load(name)['jobs']]
+
+    def diff(self, old, new):
+        """
+        compare two snapshots, only objects that differ are loaded
+        :param old: name of the old snapshot
+        :param new: name of the new snapshot
+        :return: (added, removed, changed) lists of job keys
+        """
+        old_digests = set(self.load(old)['jobs'])
+        new_digests = set(self.load(new)['jobs'])
+        before = dict((job_key(job), job) for job in map(self.get, old_digests - new_digests))
+        after = dict((job_key(job), job) for job in map(self.get, new_digests - old_digests))
+        added = sorted(k for k in after if k not in before)
+        removed = sorted(k for k in before if k not in after)
+        # snapshots written before runtime state was left out can differ in runtime state only
+        changed = sorted(k for k in after if k in before and self.encode(after[k]) != self.encode(before[k]))
+        return added, removed, changed
+
+    def remove(self, name):
+        """
+        remove a snapshot and every object no longer referenced by any other snapshot
+        :param name: name of the snapshot
+        :return: number of objects removed
+        """
+        manifest = self.load(name)
+        os.remove(self.manifest_path(name))
+        referenced = set()
+        for other in self.list():
+            referenced.update(other['jobs'])
+        removed = 0
+        for digest in set(manifest['jobs']) - referenced:
+            path = self.object_path(digest)
+            if exists(path):
+                os.remove(path)
+                removed += 1
+        return removed
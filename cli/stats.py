@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import math
+
+
+def percentile(values, q):
+    """
+    :param values: sorted values
+    :param q: percentile (0-100)
+    :return: value at the percentile (nearest rank), None without values
+    """
+    if not values:
+        return None
+    rank = max(1, int(math.ceil(q / 100.0 * len(values))))
+    return values[min(rank, len(values)) - 1]
+
+
+def summary(values):
+    """
+    :param values: observed values (unsorted)
+    :return: dict with count, min, mean, p50, p90, p95, p99 and max
+    """
+    ordered = sorted(values)
+    result = {'count': len(ordered)}
+    if not ordered:
+        return result
+    result.update({
+        'min': ordered[0],
+        'mean': sum(ordered) / float(len(ordered)),
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1],
+    })
+    return result
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import threading
+
+from contextlib import contextmanager
+from time import perf_counter
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from cli.wire import describe, inflate
+
+# request currently being timed on this thread, connections report their setup time to it
+_current = threading.local()
+
+
+def _record(field, seconds):
+    record = getattr(_current, 'record', None)
+    if record is not None:
+        record[field] += seconds
+
+
+class TimedHTTPConnection(HTTPConnection):
+
+    def _new_conn(self):
+        start = perf_counter()
+        try:
+            return super(TimedHTTPConnection, self)._new_conn()
+        finally:
+            _record('connect', perf_counter() - start)
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+
+    def _new_conn(self):
+        start = perf_counter()
+        try:
+            return super(TimedHTTPSConnection, self)._new_conn()
+        finally:
+            _record('connect', perf_counter() - start)
+
+    def connect(self):
+        # connect covers both the tcp connect (_new_conn) and the handshake
+        record = getattr(_current, 'record', None)
+        before = record['connect'] if record else 0.0
+        start = perf_counter()
+        try:
+            super(TimedHTTPSConnection, self).connect()
+        finally:
+            if record is not None:
+                record['tls'] += perf_counter() - start - (record['connect'] - before)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """
+    Transport adapter that reports connect and tls handshake time of new connections
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimedAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+class Timings(object):
+    """
+    Collects the duration of the phases of a command and of every request it issues
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = []
+        self.requests = []
+        # start of the command body, None while the invocation is being set up
+        self.command = None
+
+    @contextmanager
+    def phase(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases.append((name, perf_counter() - start))
+
+    def begin_command(self):
+        """
+        mark the start of the command body, its time outside requests and decoding is reported as render
+        """
+        self.command = perf_counter()
+
+    def request(self, send, method, server, endpoint):
+        """
+        issue a request and time connect, tls, time to first byte, transfer and decompression
+        :param send: callable issuing the request, returning a (streamed) response
+        """
+        record = {'method': method, 'server': server, 'endpoint': endpoint, 'status': None, 'bytes': 0, 'wire': 0,
+                  'encoding': '-', 'connect': 0.0, 'tls': 0.0, 'ttfb': 0.0, 'transfer': 0.0, 'inflate': 0.0, 'decode': 0.0}
+        with self.lock:
+            self.requests.append(record)
+        _current.record = record
+        start = perf_counter()
+        try:
+            r = send()
+            headers = perf_counter()
+            record['ttfb'] = headers - start - record['connect'] - record['tls']
+            if getattr(r, 'raw', None) is not None and r._content is False:
+                # read the body as sent, so the size on the wire and decompression can be reported separately
+                body = r.raw.read(decode_content=False)
+                received = perf_counter()
+                record['transfer'] = received - headers
+                r._content = inflate(body, r.headers.get('Content-Encoding'))
+                r._content_consumed = True
+                record['inflate'] = perf_counter() - received
+            else:
+                body = r.content
+                record['transfer'] = perf_counter() - headers
+        finally:
+            _current.record = None
+        record['status'] = r.status_code
+        record['bytes'] = len(r.content)
+        record['wire'] = len(body)
+        record['encoding'] = describe(r)
+        r.timing = record
+        return r
+
+    def report(self, logger, total):
+        end = perf_counter()
+        logger.info('------------------------------------------------------')
+        requests = sum(r['connect'] + r['tls'] + r['ttfb'] + r['transfer'] + r['inflate'] for r in self.requests)
+        decode = sum(r['decode'] for r in self.requests)
+        for name, seconds in self.phases:
+            logger.info("{0:<13}: {1:9.2f} ms".format(name, seconds * 1000))
+        logger.info("{0:<13}: {1:9.2f} ms ({2} requests)".format('requests', requests * 1000, len(self.requests)))
+        logger.info("{0:<13}: {1:9.2f} ms".format('decode', decode * 1000))
+        render = 0.0
+        if self.command is not None:
+            # requests of concurrent commands overlap, their sum can exceed the time of the command
+            render = max(end - self.command - requests - decode, 0.0)
+            logger.info("{0:<13}: {1:9.2f} ms".format('render', render * 1000))
+        other = total - requests - decode - render - sum(s for _, s in self.phases)
+        logger.info("{0:<13}: {1:9.2f} ms".format('other', max(other, 0.0) * 1000))
+        logger.info("{0:<13}: {1:9.2f} ms".format('total', total * 1000))
+        if self.requests:
+            logger.info('******************************************************')
+            logger.info("{0:<6} {1:<15} {2:<16} {3:>6} {4:>10} {5:>10} {6:<16} {7:>9} {8:>9} {9:>9} {10:>9} {11:>9} {12:>9}".format(
+                'method', 'server', 'endpoint', 'status', 'bytes', 'wire', 'encoding', 'connect', 'tls', 'ttfb', 'transfer', 'inflate', 'decode'))
+            for r in self.requests:
+                logger.info("{0:<6} {1:<15} {2:<16} {3:>6} {4:>10} {5:>10} {6:<16} {7:>9.2f} {8:>9.2f} {9:>9.2f} {10:>9.2f} {11:>9.2f} {12:>9.2f}".format(
+                    r['method'], r['server'], r['endpoint'], r['status'] or '-', r['bytes'], r['wire'], r['encoding'],
+                    r['connect'] * 1000, r['tls'] * 1000, r['ttfb'] * 1000, r['transfer'] * 1000, r['inflate'] * 1000, r['decode'] * 1000))
+        logger.info('------------------------------------------------------')
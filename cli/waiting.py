@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+
+from time import monotonic, sleep
+
+from cli.snapshots import job_key
+
+COMPLETED = 0
+TIMEOUT = -50
+MISSING = -51
+
+
+class Waiter(object):
+    """
+    Pending wait for a single job
+    :param kind: run (job has to run and finish), kill or idle (job has to be not running)
+    """
+
+    def __init__(self, pattern, command, kind='idle', baseline=None):
+        self.key = (pattern, command)
+        self.kind = kind
+        self.baseline = baseline
+        self.seen_running = False
+        self.result = None
+
+    def update(self, job):
+        """
+        :param job: current state of the job, None if it no longer exists
+        :return: True when the wait is over
+        """
+        if job is None:
+            self.result = MISSING
+            return True
+        if job.get('pid'):
+            # a run that was already in progress when waiting started is not the one waited for
+            if self.kind != 'run' or not self.baseline or not self.baseline.get('pid') or self.started(job):
+                self.seen_running = True
+            return False
+        if self.kind == 'run' and not self.seen_running and not self.started(job):
+            return False
+        self.result = COMPLETED
+        return True
+
+    def started(self, job):
+        """
+        :return: True when the job ran since the baseline was taken
+        """
+        return self.baseline is None or job.get('last_run') != self.baseline.get('last_run')
+
+
+class JobWaiter(object):
+    """
+    Waits for many jobs at once, every poll of /jobs is shared by all pending waiters and polls back off exponentially
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, client, interval=0.5, max_interval=10.0, backoff=2.0):
+        self.client = client
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.waiters = []
+
+    def jobs(self, keys=None):
+        """
+        :param keys: only keep the jobs with these keys
+        :return: dict of job key to job
+        """
+        r = self.client.get('/jobs')
+        if r.status_code != 200:
+            self.logger.warning("unsuccessful request: {0} ({1})".format(r.text, r.status_code))
+            return None
+        jobs = {}
+        for job in self.client.json(r):
+            key = job_key(job)
+            if keys is None or key in keys:
+                jobs[key] = job
+        return jobs
+
+    def add(self, pattern, command, kind='idle', baseline=None):
+        waiter = Waiter(pattern, command, kind, baseline)
+        self.waiters.append(waiter)
+        return waiter
+
+    def wait(self, timeout=None):
+        """
+        poll until all waiters are done or the timeout expired
+        :return: exit code, 0 if all jobs completed
+        """
+        deadline = monotonic() + timeout if timeout else None
+        interval = self.interval
+        pending = list(self.waiters)
+        while pending:
+            jobs = self.jobs(set(w.key for w in pending))
+            if jobs is not None:
+                for waiter in list(pending):
+                    if waiter.update(jobs.get(waiter.key)):
+                        pending.remove(waiter)
+                        if waiter.result == COMPLETED:
+                            self.logger.info("job {0} {1} completed".format(*waiter.key))
+                        else:
+                            self.logger.warning("job {0} {1} no longer exists".format(*waiter.key))
+            if not pending:
+                break
+            if deadline and monotonic() >= deadline:
+                for waiter in pending:
+                    waiter.result = TIMEOUT
+                    self.logger.warning("timed out waiting for job {0} {1}".format(*waiter.key))
+                break
+            sleep(min(interval, max(0.0, deadline - monotonic())) if deadline else interval)
+            interval = min(interval * self.backoff, self.max_interval)
+        return min([w.result for w in self.waiters] or [COMPLETED])
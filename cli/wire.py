@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import gzip
+import json
+import zlib
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+# urllib3 advertises zstd when one of these is installed
+try:
+    from compression.zstd import decompress as unzstd
+except ImportError:  # pragma: no cover
+    try:
+        from backports.zstd import decompress as unzstd
+    except ImportError:
+        try:
+            import zstandard
+
+            def unzstd(body):
+                return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+        except ImportError:
+            unzstd = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# endpoints returning the large job lists, only these negotiate a binary format
+ENDPOINTS = ('/jobs', '/export')
+MSGPACK = 'application/msgpack'
+
+
+def accept_encodings():
+    """
+    :return: content encodings urllib3 can decode (zstd and br only when their packages are installed), zstd first
+    """
+    encodings = [e.strip() for e in ACCEPT_ENCODING.split(',')]
+    return sorted(encodings, key=lambda e: e != 'zstd')
+
+
+def headers(endpoint):
+    """
+    :return: headers to negotiate a compact representation of the endpoint, None for other endpoints
+    """
+    if endpoint not in ENDPOINTS:
+        return None
+    accept = "{0}, application/json;q=0.9".format(MSGPACK) if msgpack else 'application/json'
+    return {'Accept': accept, 'Accept-Encoding': ', '.join(accept_encodings())}
+
+
+def inflate(body, encoding):
+    """
+    :param body: body as received on the wire
+    :param encoding: value of the content-encoding header
+    :return: decompressed body
+    """
+    for coding in reversed([c.strip().lower() for c in (encoding or '').split(',') if c.strip()]):
+        if coding in ('gzip', 'x-gzip'):
+            body = gzip.decompress(body)
+        elif coding == 'deflate':
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                body = zlib.decompress(body, -zlib.MAX_WBITS)
+        elif coding == 'zstd' and unzstd:
+            body = unzstd(body)
+        elif coding == 'br' and brotli:
+            body = brotli.decompress(body)
+        elif coding != 'identity':
+            raise ValueError("unsupported content encoding {0}".format(coding))
+    return body
+
+
+def is_msgpack(r):
+    return r.headers.get('Content-Type', '').split(';')[0].strip().lower() == MSGPACK
+
+
+def loads(r):
+    """
+    :return: decoded body of a json or msgpack response
+    """
+    if msgpack and is_msgpack(r):
+        return msgpack.unpackb(r.content, raw=False)
+    return r.json()
+
+
+def json_body(r, content):
+    """
+    :param content: decoded body of the response
+    :return: the body as json, as received when the server answered in json
+    """
+    if is_msgpack(r):
+        return json.dumps(content).encode('utf-8')
+    return r.content
+
+
+def describe(r):
+    """
+    :return: representation of the response on the wire (e.g. gzip json)
+    """
+    return "{0} {1}".format(r.headers.get('Content-Encoding') or 'identity', 'msgpack' if is_msgpack(r) else 'json')
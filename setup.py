@@ -65,7 +65,7 @@ setup(name="dcron-cli",
       license="MIT",
       entry_points={
           "console_scripts": [
-              "dcron-cli = cli.application:main",
+              "dcron-cli = cli.completion:main",
           ]
       },
       packages=[
@@ -73,6 +73,7 @@ setup(name="dcron-cli",
       ],
       include_package_data=True,
       install_requires=requirements,
+      extras_require={'wire': ['msgpack', 'urllib3[zstd]']},
       python_requires=">=3.4",
       keywords="Python, Python3",
       project_urls={
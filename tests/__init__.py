@@ -24,3 +24,13 @@
 # SOFTWARE.
 
 import tests.test_encoding
+import tests.test_snapshots
+import tests.test_consistency
+import tests.test_commands
+import tests.test_search
+import tests.test_history
+import tests.test_preflight
+import tests.test_browse
+import tests.test_drift
+import tests.test_completion
+import tests.test_offline
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import gzip
+import json
+import random
+import threading
+import time
+
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class DcronServer(object):
+    """
+    In process stand-in for a dcron cluster, every node listens on its own loopback address
+    (127.0.0.1, 127.0.0.2, ...) on a shared port and all nodes share the same job state.
+    """
+
+    def __init__(self, jobs=10, nodes=1, log_lines=3, log_size=80, latency=0.0, failure_rate=0.0, out_of_sync=(), run_time=None, seed=0, port=0, encodings=()):
+        self.nodes = ["127.0.0.{0}".format(n + 1) for n in range(nodes)]
+        self.latency = latency
+        self.run_time = run_time
+        self.failure_rate = failure_rate
+        self.out_of_sync = set(out_of_sync)
+        self.port = port
+        # representations of /jobs and /export offered besides plain json (gzip, msgpack)
+        self.encodings = set(encodings)
+        self._encoded = (None, {})
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.node_requests = {}
+        self.servers = []
+        self.threads = []
+        self.jobs = {}
+        self._cache = None
+        now = datetime.utcnow()
+        for n in range(jobs):
+            parts = "{0} * * * *".format(n % 60)
+            command = "echo job-{0}".format(n)
+            self.jobs[(parts, command)] = {
+                'parts': parts,
+                'command': command,
+                'user': 'user{0}'.format(n % 10),
+                'assigned_to': self.nodes[n % len(self.nodes)],
+                'enabled': n % 7 != 0,
+                'pid': 1000 + n if n % 50 == 0 else None,
+                'last_run': (now - timedelta(minutes=n % 120)).isoformat(),
+                'cron': "{0} {1}".format(parts, command),
+                'log': ["{0} {1}".format(i, 'x' * log_size) for i in range(log_lines)],
+            }
+
+    @property
+    def total_requests(self):
+        with self.lock:
+            return sum(self.requests.values())
+
+    def start(self):
+        handler = self._handler()
+        for node in self.nodes:
+            server = ThreadingServer((node, self.port), handler)
+            self.port = server.server_address[1]
+            self.servers.append(server)
+            thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def site(self, name='default'):
+        """
+        :return: site configuration pointing at this cluster
+        """
+        from cli.configuration import Site
+        site = Site()
+        site.name = name
+        site.servers = list(self.nodes)
+        site.port = self.port
+        return site
+
+    def clear(self):
+        with self.lock:
+            self.jobs.clear()
+            self._cache = None
+
+    def job_list(self):
+        with self.lock:
+            if self._cache is None:
+                self._cache = json.dumps(list(self.jobs.values())).encode('utf-8')
+            return self._cache
+
+    def encode(self, body, accept, accept_encoding):
+        """
+        :return: (content type, content encoding, body) of a job list negotiated with the client
+        """
+        content_type, encoding = 'application/json', None
+        if 'msgpack' in self.encodings and msgpack and 'application/msgpack' in accept:
+            content_type = 'application/msgpack'
+        if 'gzip' in self.encodings and 'gzip' in accept_encoding:
+            encoding = 'gzip'
+        with self.lock:
+            if self._encoded[0] is not body:
+                self._encoded = (body, {})
+            cache = self._encoded[1]
+        if (content_type, encoding) not in cache:
+            encoded = body
+            if content_type != 'application/json':
+                encoded = msgpack.packb(json.loads(body.decode('utf-8')))
+            if encoding:
+                encoded = gzip.compress(encoded, 6)
+            cache[(content_type, encoding)] = encoded
+        return content_type, encoding, cache[(content_type, encoding)]
+
+    def status(self):
+        return [{'ip': node, 'load': self.random.uniform(0, 100), 'state': 'running', 'time': datetime.utcnow().isoformat() + 'Z'} for node in self.nodes]
+
+    @staticmethod
+    def key(form):
+        pattern = ' '.join(form.get(k, ['*'])[0] for k in ('minute', 'hour', 'dom', 'month', 'dow'))
+        return pattern, form.get('command', [''])[0]
+
+    def handle(self, node, method, path, form):
+        """
+        :return: (status code, body) for a request
+        """
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            self.node_requests[node] = self.node_requests.get(node, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            return 500, b'injected failure'
+        if method == 'GET' and path == '/status':
+            return 200, json.dumps(self.status()).encode('utf-8')
+        if method == 'GET' and path in ('/jobs', '/export'):
+            return 200, self.job_list()
+        if method == 'GET' and path == '/cron_in_sync':
+            if node in self.out_of_sync:
+                return 409, b'cron not in sync'
+            return 200, b'cron in sync'
+        if method == 'POST' and path == '/re-balance':
+            return 200, b'ok'
+        if method == 'POST' and path == '/import':
+            imported = 0
+            for payload in form.get('payload', []):
+                for job in json.loads(payload):
+                    with self.lock:
+                        self.jobs[(job['parts'], job['command'])] = job
+                        self._cache = None
+                    imported += 1
+            return 200, "imported {0} jobs".format(imported).encode('utf-8')
+        if method != 'POST' or path not in ('/add_job', '/remove_job', '/run_job', '/kill_job'):
+            return 404, b'not found'
+        pattern, command = self.key(form)
+        with self.lock:
+            self._cache = None
+            job = self.jobs.get((pattern, command))
+            if path == '/add_job':
+                self.jobs[(pattern, command)] = {
+                    'parts': pattern,
+                    'command': command,
+                    'user': 'dcron',
+                    'assigned_to': self.random.choice(self.nodes),
+                    'enabled': 'disabled' not in form,
+                    'pid': None,
+                    'last_run': None,
+                    'cron': "{0} {1}".format(pattern, command),
+                    'log': [],
+                }
+                return 201, b'created'
+            if not job:
+                return 404, b'job not found'
+            if path == '/remove_job':
+                del self.jobs[(pattern, command)]
+                return 200, b'removed'
+            if path == '/run_job':
+                job['pid'] = self.random.randint(2, 65535)
+                job['last_run'] = datetime.utcnow().isoformat()
+                if self.run_time is not None:
+                    threading.Timer(self.run_time, self.finish, args=((pattern, command),)).start()
+            else:
+                job['pid'] = None
+            return 202, b'accepted'
+
+    def finish(self, key):
+        with self.lock:
+            if key in self.jobs:
+                self.jobs[key]['pid'] = None
+                self._cache = None
+
+    def _handler(self):
+        cluster = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def respond(self, method):
+                path = self.path.split('?')[0]
+                form = {}
+                if method == 'POST':
+                    length = int(self.headers.get('Content-Length', 0))
+                    form = parse_qs(self.rfile.read(length).decode('utf-8'))
+                code, body = cluster.handle(self.server.server_address[0], method, path, form)
+                content_type, encoding = 'application/json', None
+                if code == 200 and path in ('/jobs', '/export') and cluster.encodings:
+                    content_type, encoding, body = cluster.encode(body, self.headers.get('Accept', ''), self.headers.get('Accept-Encoding', ''))
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                if encoding:
+                    self.send_header('Content-Encoding', encoding)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self.respond('GET')
+
+            def do_POST(self):
+                self.respond('POST')
+
+        return Handler
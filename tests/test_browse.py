@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from cli.browse import JobList, job_form
+from tests.server import DcronServer
+
+
+def jobs():
+    return list(DcronServer(jobs=100, nodes=3).jobs.values())
+
+
+def test_filter():
+    job_list = JobList(jobs())
+    job_list.filter('user3')
+    assert len(job_list) == 10
+    job_list.filter('user3 node:127.0.0.2')
+    assert all(job_list.job(p)['assigned_to'] == '127.0.0.2' for p in range(len(job_list)))
+    assert len(job_list) == len([j for j in jobs() if j['user'] == 'user3' and j['assigned_to'] == '127.0.0.2'])
+    job_list.filter('')
+    assert len(job_list) == 100
+    job_list.filter('running')
+    assert len(job_list) == 2
+
+
+def test_filter_typed():
+    for query in ('node:127.0.0.2', 'pattern:5', 'user3 command:job-1', 'user1 user'):
+        typed = JobList(jobs())
+        for position in range(1, len(query) + 1):
+            typed.filter(query[:position])
+        at_once = JobList(jobs())
+        at_once.filter(query)
+        assert len(at_once) > 0
+        assert typed.view == at_once.view
+    # deleting characters widens the result again
+    typed.filter('user1')
+    assert len(typed) == 10
+
+
+def test_sort():
+    job_list = JobList(jobs())
+    assert job_list.cycle_sort() == 'node'
+    nodes = [job_list.job(p)['assigned_to'] for p in range(len(job_list))]
+    assert nodes == sorted(nodes)
+    job_list.filter('user1')
+    assert job_list.cycle_sort() == 'user'
+    assert job_list.cycle_sort() == 'last run'
+    runs = [job_list.job(p)['last_run'] for p in range(len(job_list))]
+    assert runs == sorted(runs, reverse=True)
+    job_list.toggle_reverse()
+    assert [job_list.job(p)['last_run'] for p in range(len(job_list))] == runs[::-1]
+    assert len(job_list.row(0, 40)) <= 40
+
+
+def test_job_form():
+    assert job_form({'parts': '1 2 3 4 5', 'command': 'echo'}) == {'command': 'echo', 'minute': '1', 'hour': '2', 'dom': '3', 'month': '4', 'dow': '5'}
@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+import requests
+
+from click.testing import CliRunner
+
+from cli.agent import Agent
+from cli.application import cli
+from cli.client import Client
+from cli.configuration import Configuration
+from cli.exporter import Exporter
+from cli.ping import Pinger
+from cli.waiting import JobWaiter, Waiter
+from tests.server import DcronServer
+
+
+@pytest.fixture
+def cluster(tmpdir):
+    with DcronServer(jobs=20, nodes=3) as server:
+        config = Configuration()
+        config.sites = [server.site()]
+        server.config_file = str(tmpdir.join('sites.json'))
+        config.write(server.config_file)
+        yield server
+
+
+def invoke(cluster, *args):
+    return CliRunner().invoke(cli, ['-c', cluster.config_file] + list(args))
+
+
+def test_status(cluster):
+    result = invoke(cluster, 'status')
+    assert result.exit_code == 0
+    assert '3 nodes in cluster' in result.output
+    assert cluster.requests['/cron_in_sync'] == 3
+
+
+def test_jobs(cluster):
+    result = invoke(cluster, 'jobs')
+    assert result.exit_code == 0
+    assert 'echo job-19' in result.output
+
+
+def test_add_run_remove(cluster):
+    assert invoke(cluster, 'add', '-p', '1 2 3 4 5', '-c', 'uptime').exit_code == 0
+    assert ('1 2 3 4 5', 'uptime') in cluster.jobs
+    assert invoke(cluster, 'run', '-p', '1 2 3 4 5', '-c', 'uptime').exit_code == 0
+    assert cluster.jobs[('1 2 3 4 5', 'uptime')]['pid']
+    assert invoke(cluster, 'remove', '-p', '1 2 3 4 5', '-c', 'uptime').exit_code == 0
+    assert ('1 2 3 4 5', 'uptime') not in cluster.jobs
+
+
+def test_export_import(cluster, tmpdir):
+    file_name = str(tmpdir.join('export', 'jobs.json'))
+    assert invoke(cluster, 'export', '-f', file_name).exit_code == 0
+    cluster.clear()
+    assert invoke(cluster, 'import', '-f', file_name).exit_code == 0
+    assert len(cluster.jobs) == 20
+
+
+def test_import_preflight(cluster, tmpdir):
+    file_name = str(tmpdir.join('jobs.json'))
+    jobs = json.loads(cluster.job_list().decode('utf-8'))
+    new = {'parts': '*/5 * * * *', 'command': 'echo new'}
+    with open(file_name, 'w') as fp:
+        json.dump(jobs + [new, new, {'parts': '* * *', 'command': 'echo invalid'}], fp)
+    result = invoke(cluster, 'import', '--dry-run', '-f', file_name)
+    assert 'records: 23, kept: 1, invalid: 1, duplicates: 1, existing: 20' in result.output
+    assert len(cluster.jobs) == 20
+    assert invoke(cluster, 'import', '-f', file_name).exit_code == 0
+    assert len(cluster.jobs) == 21
+
+
+def test_read_distribution(cluster):
+    for _ in range(6):
+        assert invoke(cluster, '-r', 'round-robin', 'jobs').exit_code == 0
+    assert sorted(cluster.node_requests.values()) == [2, 2, 2]
+    assert invoke(cluster, '-r', 'load', 'status').exit_code == 0
+    with open(os.path.join(os.path.dirname(cluster.config_file), 'distribution', 'default.json')) as fp:
+        assert sorted(json.load(fp)['loads']) == sorted(cluster.nodes)
+    before = dict(cluster.node_requests)
+    assert invoke(cluster, '-r', 'load', 'add', '-p', '* * * * *', '-c', 'echo entry').exit_code == 0
+    entry = sorted(cluster.nodes)[0]
+    assert dict((n, c - before[n]) for n, c in cluster.node_requests.items()) == dict((n, int(n == entry)) for n in cluster.nodes)
+
+
+def test_from_export(cluster, tmpdir):
+    file_name = str(tmpdir.join('jobs.json'))
+    assert invoke(cluster, 'export', '-f', file_name).exit_code == 0
+    job = next(iter(cluster.jobs.values()))
+    served = cluster.total_requests
+    result = invoke(cluster, 'jobs', '--from-export', file_name, '-u', job['user'], '-n', job['assigned_to'])
+    assert result.exit_code == 0
+    assert "{0} {1}".format(job['parts'], job['command']) in result.output
+    assert os.path.exists(file_name + '.idx')
+    result = invoke(cluster, 'details', '--from-export', file_name, '-p', job['parts'], '-c', job['command'])
+    assert "- user            : {0}".format(job['user']) in result.output
+    assert invoke(cluster, 'running', '--from-export', file_name).exit_code == 0
+    assert cluster.total_requests == served
+
+
+def test_ping(cluster):
+    result = invoke(cluster, 'ping', '-n', '5', '--fresh')
+    assert result.exit_code == 0
+    assert cluster.requests['/cron_in_sync'] == 15
+    for node in cluster.nodes:
+        assert "{0:<15}     5      0     0".format(node) in result.output
+
+
+def test_ping_interval():
+    class Response(object):
+        timing = {'status': 200, 'connect': 0.0, 'tls': 0.0, 'ttfb': 0.01, 'transfer': 0.0}
+
+    class Upstream(object):
+        def __init__(self):
+            self.calls = []
+
+        def get(self, endpoint, server=None, **kwargs):
+            start = time.monotonic()
+            time.sleep(0.01)
+            self.calls.append((server, start, time.monotonic()))
+            return Response()
+
+    client = Upstream()
+    pinger = Pinger(client, ['a', 'b'], count=3, concurrency=8, interval=0.05)
+    pinger.run()
+    for server in ('a', 'b'):
+        calls = sorted(c[1:] for c in client.calls if c[0] == server)
+        assert len(calls) == 3
+        assert all(b[0] - a[1] >= 0.05 for a, b in zip(calls, calls[1:]))
+    assert [r[0] for r in pinger.results['a']] == [0, 1, 2]
+
+
+@pytest.mark.parametrize('timings', [False, True])
+def test_compressed_jobs(cluster, tmpdir, timings):
+    cluster.encodings = {'gzip', 'msgpack'}
+    result = invoke(cluster, *(['--timings'] if timings else []) + ['jobs'])
+    assert result.exit_code == 0
+    assert 'job (user1@' in result.output
+    if timings:
+        assert 'gzip' in result.output
+    file_name = str(tmpdir.join('jobs.json'))
+    assert invoke(cluster, 'export', '-f', file_name).exit_code == 0
+    with open(file_name) as fp:
+        assert len(json.load(fp)) == 20
+
+
+def test_drift(cluster):
+    result = invoke(cluster, 'drift', '-g', '0')
+    assert result.exit_code == 0
+    for node in cluster.nodes:
+        assert node in result.output
+    assert invoke(cluster, 'drift', '-z', 'Nowhere/Atlantis').exit_code == -120
+
+
+def test_verify(cluster):
+    assert invoke(cluster, 'verify').exit_code == 0
+
+
+def test_snapshot_restore(cluster):
+    assert invoke(cluster, 'snapshot', 'create', '-n', '../first').exit_code == -36
+    assert invoke(cluster, 'snapshot', 'rm', '../first').exit_code == -37
+    assert invoke(cluster, 'snapshot', 'create', '-n', 'first').exit_code == 0
+    cluster.clear()
+    assert invoke(cluster, 'snapshot', 'restore', 'first').exit_code == 0
+    assert len(cluster.jobs) == 20
+    assert json.loads(cluster.job_list().decode('utf-8'))
+
+
+def test_timings(cluster):
+    result = invoke(cluster, '--timings', 'jobs')
+    assert result.exit_code == 0
+    assert 'GET    127.0.0.1       /jobs               200' in result.output
+    for phase in ('config', 'requests', 'decode', 'render', 'other', 'total'):
+        assert "{0:<13}: ".format(phase) in result.output
+
+
+def test_exporter(cluster, tmpdir):
+    textfile = str(tmpdir.join('dcron.prom'))
+    assert invoke(cluster, 'exporter', '--once', '-t', textfile).exit_code == 0
+    with open(textfile) as fp:
+        metrics = fp.read()
+    assert 'dcron_jobs 20' in metrics
+    assert 'dcron_cron_in_sync{node="127.0.0.3"} 1' in metrics
+    assert 'dcron_request_duration_seconds_count{endpoint="/jobs",server="127.0.0.1"} 1' in metrics
+    assert metrics.endswith('# EOF\n')
+
+
+def test_exporter_drops_stale_metrics(cluster):
+    site = cluster.site()
+    exporter = Exporter(Client(site, sorted(site.servers)[0]))
+    exporter.poll()
+    assert b'dcron_jobs 20' in exporter.content
+    timed = exporter.timed
+
+    def failing(endpoint, server=None):
+        if endpoint == '/jobs':
+            raise requests.exceptions.ConnectionError('unreachable')
+        return timed(endpoint, server)
+
+    exporter.timed = failing
+    exporter.poll()
+    assert b'dcron_up 0' in exporter.content
+    assert b'dcron_jobs ' not in exporter.content
+    assert b'dcron_jobs_running' not in exporter.content
+    assert b'dcron_node_load{node="127.0.0.1"}' in exporter.content
+
+
+def test_exporter_survives_bad_answers(cluster, tmpdir):
+    site = cluster.site()
+    exporter = Exporter(Client(site, sorted(site.servers)[0]), interval=0.01, textfile=str(tmpdir.join('missing', 'dcron.prom')))
+    exporter.poll()
+    timed = exporter.timed
+
+    def unexpected(endpoint, server=None):
+        r = timed(endpoint, server)
+        if endpoint == '/status':
+            r._content = b'{"error": "unauthorized"}'
+        return r
+
+    exporter.timed = unexpected
+    exporter.poll()
+    assert b'dcron_up 0' in exporter.content
+    assert b'dcron_node_load' not in exporter.content
+    assert b'dcron_jobs 20' in exporter.content
+    polls = []
+
+    def poll():
+        polls.append(1)
+        if len(polls) == 3:
+            raise SystemExit()
+        raise KeyError('load')
+
+    exporter.poll = poll
+    with pytest.raises(SystemExit):
+        exporter.run()
+    assert len(polls) == 3
+
+
+def test_agent(cluster, tmpdir, caplog):
+    socket_path = str(tmpdir.join('agent.sock'))
+    threading.Thread(target=Agent(refresh=60).serve, args=(socket_path,), daemon=True).start()
+    while not tmpdir.join('agent.sock').exists():
+        time.sleep(0.01)
+    for _ in range(3):
+        result = invoke(cluster, '--agent-socket', socket_path, 'jobs')
+        assert result.exit_code == 0
+        assert 'echo job-19' in result.output
+    assert cluster.requests['/jobs'] == 1
+    assert invoke(cluster, '--agent-socket', socket_path, 'add', '-p', '1 2 3 4 5', '-c', 'uptime').exit_code == 0
+    assert 'uptime' in invoke(cluster, '--agent-socket', socket_path, 'jobs').output
+    assert cluster.requests['/jobs'] == 2
+    # the exporter measures the cluster, not the cache of the agent
+    assert invoke(cluster, '--agent-socket', socket_path, 'exporter', '--once').exit_code == 0
+    assert cluster.requests['/jobs'] == 3
+    assert 'invalid request' not in caplog.text
+
+
+def test_agent_passes_on_changes():
+    class Upstream(Agent):
+        def fetch(self, key):
+            with self.lock:
+                self.fetched.append(key[2])
+            time.sleep(0.1)
+            return 200, {}, b'[]'
+
+    agent = Upstream()
+    agent.fetched = []
+    threads = []
+    for method in ('POST', 'POST', 'GET', 'GET'):
+        request = {'site': '{}', 'verify': True, 'method': method, 'endpoint': '/run_job',
+                   'data': {'pattern': '* * * * *', 'command': 'ls'} if method == 'POST' else None}
+        threads.append(threading.Thread(target=agent.handle, args=(request,)))
+        threads[-1].start()
+    for thread in threads:
+        thread.join()
+    assert sorted(agent.fetched) == ['GET', 'POST', 'POST']
+
+
+def test_run_wait(cluster):
+    cluster.run_time = 0.2
+    assert invoke(cluster, 'run', '-p', '1 * * * *', '-c', 'echo job-1', '--wait').exit_code == 0
+    assert not cluster.jobs[('1 * * * *', 'echo job-1')]['pid']
+    cluster.run_time = None
+    assert invoke(cluster, 'run', '-p', '1 * * * *', '-c', 'echo job-1').exit_code == 0
+    result = invoke(cluster, 'wait', '--all-running', '--timeout', '0.1')
+    assert result.exit_code == -50
+    assert invoke(cluster, 'kill', '-p', '1 * * * *', '-c', 'echo job-1', '--wait').exit_code == 0
+
+
+def test_grep(cluster):
+    cluster.jobs[('3 * * * *', 'echo job-3')]['log'] = ['starting', 'ERROR: disk full', 'done']
+    result = invoke(cluster, 'grep', '-C', '1', 'error', '-i')
+    assert result.exit_code == 0
+    assert '127.0.0.1 3 * * * * echo job-3:2:ERROR: disk full' in result.output
+    assert 'echo job-3-3-done' in result.output
+    assert invoke(cluster, 'grep', 'no such text').exit_code == -60
+
+
+def test_bench(cluster):
+    result = invoke(cluster, 'bench', '-n', '40', '-c', '4')
+    assert result.exit_code == 0
+    assert '40 requests' in result.output
+    assert not [k for k in cluster.jobs if 'dcron-bench' in k[1]]
+
+
+def test_bench_interrupted(cluster):
+    threading.Timer(0.5, os.kill, args=(os.getpid(), signal.SIGINT)).start()
+    result = invoke(cluster, 'bench', '--mix', 'add=1', '-r', '20', '-d', '60', '-c', '4')
+    assert result.exit_code == 1
+    assert not [k for k in cluster.jobs if 'dcron-bench' in k[1]]
+
+
+def test_status_history(cluster):
+    assert invoke(cluster, 'status', '--history').exit_code == -80
+    assert invoke(cluster, 'status', '--record').exit_code == 0
+    assert invoke(cluster, 'exporter', '--once', '--record').exit_code == 0
+    result = invoke(cluster, 'status', '--history', '--since', '1h', '-n', '127.0.0.1')
+    assert result.exit_code == 0
+    assert '127.0.0.1             2' in result.output
+    assert '127.0.0.2' not in result.output
+
+
+def test_run_wait_while_running():
+    job = {'parts': '1 * * * *', 'command': 'echo job-1'}
+    waiter = Waiter(job['parts'], job['command'], 'run', dict(job, pid=10, last_run='2026-10-18T12:00:00'))
+    # the run in progress when waiting started ends
+    assert not waiter.update(dict(job, pid=10, last_run='2026-10-18T12:00:00'))
+    assert not waiter.update(dict(job, pid=None, last_run='2026-10-18T12:00:00'))
+    # the requested run
+    assert not waiter.update(dict(job, pid=11, last_run='2026-10-18T12:01:00'))
+    assert waiter.update(dict(job, pid=None, last_run='2026-10-18T12:01:00'))
+    assert waiter.result == 0
+
+
+def test_wait_deadline_passed(monkeypatch):
+    class Running(JobWaiter):
+        def jobs(self, keys=None):
+            return dict((key, {'pid': 10}) for key in keys)
+
+    # the deadline passes between the timeout check and the sleep
+    clock = iter([0.0, 0.5, 1.5, 2.0])
+    monkeypatch.setattr('cli.waiting.monotonic', lambda: next(clock))
+    waiter = Running(None)
+    waiter.add('1 * * * *', 'echo job-1')
+    assert waiter.wait(timeout=1.0) == -50
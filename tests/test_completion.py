@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import click
+
+from io import StringIO
+from os.path import join
+
+from cli.application import cli
+from cli.completion import read_index, update_jobs, complete_patterns, complete_sites, complete_servers, \
+    shell_value, fast_complete, ROOT_OPTIONS, JOB_COMMANDS
+from cli.configuration import Configuration, Site
+
+
+def configuration(tmpdir):
+    config_file = join(str(tmpdir), 'sites.json')
+    site = Site()
+    site.servers = ['10.0.0.1', '10.0.0.2']
+    other = Site()
+    other.name = 'other'
+    config = Configuration()
+    config.sites = [site, other]
+    config.write(config_file)
+    update_jobs(config_file, 'default', [{'parts': '0 * * * *', 'command': 'echo a'},
+                                         {'parts': '5 1 * * *', 'command': 'echo b'}])
+    return config_file
+
+
+def test_read_index(tmpdir):
+    config_file = configuration(tmpdir)
+    index = read_index(config_file)
+    assert sorted(index['sites']) == ['default', 'other']
+    assert index['sites']['default']['servers'] == ['10.0.0.1', '10.0.0.2']
+    assert index['sites']['default']['patterns'] == ['0 * * * *', '5 1 * * *']
+    assert index['sites']['default']['commands'] == ['echo a', 'echo b']
+    update_jobs(config_file, 'unknown', [{'parts': '* * * * *', 'command': 'ls'}])
+    assert sorted(read_index(config_file)['sites']) == ['default', 'other']
+
+
+def test_complete_callbacks(tmpdir, monkeypatch):
+    config_file = configuration(tmpdir)
+    ctx = click.Context(cli, info_name='dcron-cli')
+    ctx.params = {'config_file': config_file, 'site_name': 'default'}
+    monkeypatch.delenv('_DCRON_CLI_COMPLETE', raising=False)
+    assert complete_sites(ctx, 'o') == ['other']
+    assert complete_servers(ctx, '1') == ['10.0.0.1', '10.0.0.2']
+    assert complete_patterns(ctx, '5') == ['5 1 * * *']
+    monkeypatch.setenv('_DCRON_CLI_COMPLETE', 'bash_complete')
+    assert complete_patterns(ctx, '') == ["'0 * * * *'", "'5 1 * * *'"]
+
+
+def test_shell_value():
+    assert shell_value('0 * * * *', {'_DCRON_CLI_COMPLETE': 'bash_complete'}) == "'0 * * * *'"
+    assert shell_value('first', {'_DCRON_CLI_COMPLETE': 'bash_complete'}) == 'first'
+    assert shell_value('0 * * * *', {'_DCRON_CLI_COMPLETE': 'zsh_complete'}) == '0 * * * *'
+
+
+def complete(shell, words, cword=None):
+    environ = {'_DCRON_CLI_COMPLETE': '{0}_complete'.format(shell), 'COMP_WORDS': words}
+    if cword is not None:
+        environ['COMP_CWORD'] = str(cword)
+    out = StringIO()
+    if not fast_complete(environ, out):
+        return None
+    return out.getvalue()
+
+
+def test_fast_complete(tmpdir):
+    config_file = configuration(tmpdir)
+    assert complete('bash', 'dcron-cli -c {0} run -p '.format(config_file), 5) == \
+        "plain,'0 * * * *'\nplain,'5 1 * * *'\n"
+    assert complete('bash', 'dcron-cli -c {0} kill -c echo'.format(config_file), 5) == \
+        "plain,'echo a'\nplain,'echo b'\n"
+    assert complete('zsh', 'dcron-cli -c {0} -s o'.format(config_file), 4) == "plain\nother\n_\n"
+    assert complete('fish', 'dcron-cli -c {0} -m 10.'.format(config_file), None) is None
+    environ = {'_DCRON_CLI_COMPLETE': 'fish_complete', 'COMP_WORDS': 'dcron-cli -c {0} -m 10.'.format(config_file),
+               'COMP_CWORD': '10.'}
+    out = StringIO()
+    assert fast_complete(environ, out)
+    assert out.getvalue() == "plain,10.0.0.1\nplain,10.0.0.2\n"
+    # sub commands and options are completed by click
+    assert complete('bash', 'dcron-cli -c {0} ru'.format(config_file), 3) is None
+    assert complete('bash', 'dcron-cli -c {0} add -p '.format(config_file), 5) is None
+
+
+def test_fast_complete_matches_application():
+    root = [o for p in cli.params if isinstance(p, click.Option) and not p.is_flag for o in p.opts]
+    assert sorted(root) == sorted(ROOT_OPTIONS)
+    commands = [name for name, command in cli.commands.items()
+                if any('--pattern' in p.opts and p._custom_shell_complete for p in command.params)]
+    assert sorted(commands) == sorted(JOB_COMMANDS)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from cli.consistency import job_digests, site_digest, compare
+
+
+def test_compare_nodes():
+    jobs = [{'parts': '* * * * *', 'command': 'ls', 'pid': None}, {'parts': '0 * * * *', 'command': 'date', 'pid': None}]
+    a = job_digests(jobs)
+    b = job_digests([dict(jobs[0], pid=12), jobs[1]])
+    c = job_digests([dict(jobs[0], enabled=False), {'parts': '0 0 * * *', 'command': 'who'}])
+    assert site_digest(a) == site_digest(b)
+    assert site_digest(a) != site_digest(c)
+    report = compare({'a': a, 'b': b, 'c': c})
+    assert report['a'] == ([], [], [])
+    assert report['c'] == ([('0 * * * *', 'date')], [('0 0 * * *', 'who')], [('* * * * *', 'ls')])
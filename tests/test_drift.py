@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from datetime import datetime, timedelta
+
+from cli.cron import CronPattern
+from cli.drift import Drift
+
+NOW = datetime(2026, 3, 4, 12, 30, 0)
+
+
+def test_previous():
+    assert CronPattern('*/15 9-17 * * mon-fri').previous(NOW) == datetime(2026, 3, 4, 12, 30)
+    assert CronPattern('0 18 * * *').previous(NOW) == datetime(2026, 3, 3, 18, 0)
+    # 2026-03-01 is a sunday
+    assert CronPattern('0 0 * * 0').previous(NOW) == datetime(2026, 3, 1, 0, 0)
+    assert CronPattern('0 0 1 * 3').previous(NOW) == datetime(2026, 3, 4, 0, 0)
+    assert CronPattern('0 0 30 2 *').previous(NOW) is None
+
+
+def test_fires():
+    hourly = CronPattern('0 * * * *')
+    assert hourly.fires(datetime(2026, 3, 1, 12, 0), NOW) == 3 * 24
+    assert hourly.fires(datetime(2026, 3, 4, 11, 0, 30), NOW) == 1
+    assert CronPattern('*/10 * * * *').fires(datetime(2026, 3, 4, 12, 0), NOW) == 3
+
+
+def test_fires_over_years():
+    start = datetime(2024, 2, 3, 9, 30)
+    for text in ('0 9,17 * * mon-fri', '0 0 13 * 5', '30 9 29 2 *'):
+        parsed = CronPattern(text)
+        expected, hour = 0, start.replace(minute=0)
+        while hour <= NOW:
+            if parsed.matches_day(hour) and hour.hour in parsed.hours:
+                expected += sum(1 for m in parsed.minutes if start < hour.replace(minute=m) <= NOW)
+            hour += timedelta(hours=1)
+        assert parsed.fires(start, NOW) == expected
+    assert CronPattern('30 9 29 2 *').previous(NOW) == datetime(2024, 2, 29, 9, 30)
+
+
+def test_drift():
+    drift = Drift(now=NOW, grace=60)
+    drift.add({'parts': '0 * * * *', 'command': 'on time', 'assigned_to': 'a', 'enabled': True, 'last_run': '2026-03-04T12:00:05'})
+    drift.add({'parts': '0 * * * *', 'command': 'behind', 'assigned_to': 'a', 'enabled': True, 'last_run': '2026-03-04T09:02:00.123456'})
+    drift.add({'parts': '* * * * *', 'command': 'never', 'assigned_to': 'b', 'enabled': True, 'last_run': None})
+    drift.add({'parts': '* * * * *', 'command': 'disabled', 'assigned_to': 'b', 'enabled': False, 'last_run': None})
+    drift.add({'parts': '0 * * *', 'command': 'invalid', 'assigned_to': 'b', 'enabled': True, 'last_run': None})
+    (a, jobs, never, behind, missed, lateness), (b, _, b_never, _, _, _) = drift.report()
+    assert (a, jobs, never, behind, missed) == ('a', 2, 0, 1, 3)
+    assert (lateness['min'], lateness['max']) == (5, 120)
+    assert (b, b_never) == ('b', 1)
+    assert (drift.skipped, drift.invalid) == (1, 1)
+    assert drift.most_delayed()[0][3] == 'behind'
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from cli.history import History
+
+
+def test_ring_buffer(tmpdir):
+    path = str(tmpdir.join('history', 'site.ring'))
+    with History(path, capacity=10) as history:
+        for t in range(15):
+            history.append([(t, 'a', 'running', t * 2.0, t % 3 != 0, t), (t, 'b', 'disconnected', None, None, 0)])
+        assert history.count == 10
+        samples = list(history.query())
+        assert samples[0][0] == 10
+        assert samples[-1] == (14, 'b', 'disconnected', samples[-1][3], None, 0)
+        assert [s[0] for s in history.query(since=12, until=14, node='a')] == [12, 13]
+        totals = history.aggregate(since=12, node='a')
+        assert totals[('a', None)]['load'] == (24.0, 26.0, 28.0)
+        assert totals[('a', None)]['in_sync'] == 2 / 3.0
+    with History(path) as history:
+        assert history.capacity == 10
+        buckets = history.aggregate(node='b', bucket=2)
+        assert buckets[('b', 12)]['samples'] == 2
+        assert buckets[('b', 12)]['load'] is None
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+
+from os.path import join
+
+from cli.offline import ExportIndex, index_path
+
+
+def test_truncated_index_is_rebuilt(tmpdir):
+    export = join(str(tmpdir), 'export.json')
+    with open(export, 'w') as fp:
+        json.dump([{'parts': '* * * * *', 'command': 'ls', 'enabled': True},
+                   {'parts': '0 * * * *', 'command': 'date', 'enabled': False}], fp)
+    with open(index_path(export), 'wb') as fp:
+        fp.write(b'DCRX')
+    index = ExportIndex.open(export)
+    assert index.count == 2
+    assert index.find(command='date') == [{'parts': '0 * * * *', 'command': 'date', 'enabled': False}]
+    assert [j['command'] for j in index.find(enabled=True)] == ['ls']
+    index.close()
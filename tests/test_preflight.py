@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import io
+import json
+
+import pytest
+
+from cli.cron import CronPattern
+from cli.preflight import existing_digests, preflight
+from cli.records import RecordError, iter_records
+
+
+def test_cron_pattern():
+    pattern = CronPattern('*/15 9-17 * jan-mar mon-fri')
+    assert pattern.minutes == {0, 15, 30, 45}
+    assert pattern.hours == set(range(9, 18))
+    assert pattern.months == {1, 2, 3}
+    assert pattern.weekdays == {1, 2, 3, 4, 5}
+    assert CronPattern('@daily').pattern == '0 0 * * *'
+    for invalid in ('* * * *', '60 * * * *', '* * 0 * *', '*/0 * * * *', '5-1 * * * *', 'x * * * *'):
+        with pytest.raises(ValueError):
+            CronPattern(invalid)
+
+
+def test_iter_records_offsets():
+    jobs = [{'parts': '* * * * *', 'command': "echo é {0}".format(i)} for i in range(100)]
+    data = json.dumps(jobs).encode('utf-8')
+    records = list(iter_records(io.BytesIO(data), chunk_size=16))
+    assert [r for _, _, r in records] == jobs
+    for offset, length, record in records:
+        assert json.loads(data[offset:offset + length].decode('utf-8')) == record
+    with pytest.raises(RecordError):
+        list(iter_records(io.BytesIO(b'[{"parts": "* * * * *"}, {"command": ')))
+
+
+def test_iter_records_malformed_early():
+    class Source(io.BytesIO):
+        def read(self, size=-1):
+            data = super(Source, self).read(size)
+            self.consumed = getattr(self, 'consumed', 0) + len(data)
+            return data
+
+    rest = json.dumps([{'parts': '* * * * *', 'command': "echo {0}".format(i)} for i in range(20000)])
+    source = Source(('[{"parts": "* * * * *"}, {"command": x}, ' + rest[1:]).encode('utf-8'))
+    with pytest.raises(RecordError):
+        list(iter_records(source, chunk_size=1024))
+    assert source.consumed < 4096
+    # literals and escapes cut off by a chunk boundary are still read on
+    jobs = [{'n': -1.5e+10, 'ok': True, 'no': False, 'x': None, 'inf': float('-inf'), 'c': "\u00e9 \"x\""}] * 3
+    data = json.dumps(jobs).encode('utf-8')
+    for chunk_size in range(1, 40):
+        assert [r for _, _, r in iter_records(io.BytesIO(data), chunk_size=chunk_size)] == jobs
+
+
+def test_preflight():
+    jobs = [
+        {'parts': '* * * * *', 'command': 'echo 1'},
+        {'parts': '*  *  * * *', 'command': 'echo 1 '},
+        {'minute': '0', 'hour': '1', 'dom': '*', 'month': '*', 'dow': '*', 'command': 'echo 2'},
+        {'parts': '0 25 * * *', 'command': 'echo 3'},
+        {'parts': '0 1 * * *'},
+        {'parts': '@hourly', 'command': 'echo 4'},
+    ]
+    existing = existing_digests([{'parts': '0 * * * *', 'command': 'echo 4'}])
+    target = io.BytesIO()
+    report = preflight(io.BytesIO(json.dumps(jobs).encode('utf-8')), target, existing)
+    assert (report.total, report.kept, report.invalid, report.duplicates, report.existing) == (6, 2, 2, 1, 1)
+    assert json.loads(target.getvalue().decode('utf-8')) == jobs[:1] + jobs[2:3]
+    lines = b'\n'.join(json.dumps(job).encode('utf-8') for job in jobs[:3]) + b'\nnot json\n'
+    report = preflight(io.BytesIO(lines), None)
+    assert (report.total, report.kept, report.invalid, report.duplicates) == (4, 2, 1, 1)
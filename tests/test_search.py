@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import cli.search
+
+from cli.search import search
+
+
+def test_parallel_search(monkeypatch):
+    monkeypatch.setattr(cli.search, 'PARALLEL_THRESHOLD', 10)
+    monkeypatch.setattr(cli.search, 'CHUNK_SIZE', 7)
+    jobs = [{'parts': '* * * * *', 'command': str(i), 'assigned_to': 'a', 'log': ['ok', 'failed {0}'.format(i)]} for i in range(50)]
+    sequential = list(search(jobs, 'fail', context=1, processes=1))
+    assert len(sequential) == 50
+    assert sequential[0] == ('* * * * *', '0', 'a', 2, ['ok'], 'failed 0', [])
+    assert list(search(jobs, 'fail', context=1, processes=2)) == sequential
+    assert list(search(jobs, 'fail', max_count=3, processes=2)) == list(search(jobs, 'fail', processes=1))[:3]
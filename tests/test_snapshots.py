@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-#
+
+# MIT License
+#
+# Copyright (c) 2019 Pim Witlox
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import pytest
+
+from cli.snapshots import SnapshotStore
+
+
+def test_snapshot_deduplication(tmpdir):
+    store = SnapshotStore(str(tmpdir))
+    jobs = [{'parts': '* * * * *', 'command': 'ls'}, {'parts': '0 * * * *', 'command': 'date'}]
+    first, stored = store.create(jobs, 'first')
+    assert stored == 2
+    jobs[1] = {'parts': '0 * * * *', 'command': 'date', 'enabled': True}
+    jobs.append({'parts': '0 0 * * *', 'command': 'who'})
+    second, stored = store.create(jobs, 'second')
+    assert stored == 2
+    assert [m['name'] for m in store.list()] == ['first', 'second']
+    assert store.jobs('second') == jobs
+    added, removed, changed = store.diff('first', 'second')
+    assert added == [('0 0 * * *', 'who')]
+    assert removed == []
+    assert changed == [('0 * * * *', 'date')]
+    assert store.remove('first') == 1
+
+
+def test_snapshot_ignores_runtime_state(tmpdir):
+    store = SnapshotStore(str(tmpdir))
+    jobs = [{'parts': '* * * * *', 'command': 'ls', 'pid': None, 'last_run': None, 'log': []}]
+    store.create(jobs, 'first')
+    jobs[0] = {'parts': '* * * * *', 'command': 'ls', 'pid': 42, 'last_run': '2026-10-18T12:00:00', 'log': ['done']}
+    second, stored = store.create(jobs, 'second')
+    assert stored == 0
+    assert store.jobs('second') == [{'parts': '* * * * *', 'command': 'ls'}]
+    assert store.diff('first', 'second') == ([], [], [])
+
+
+def test_snapshot_names(tmpdir):
+    store = SnapshotStore(str(tmpdir.join('site')))
+    for name in ('../escape', 'a/b', '.hidden', '..'):
+        with pytest.raises(ValueError):
+            store.create([], name)
+        with pytest.raises(KeyError):
+            store.load(name)
+    store.create([], 'before-v1.2_rc')
+    assert [m['name'] for m in store.list()] == ['before-v1.2_rc']
+    assert not tmpdir.join('escape.json').exists()